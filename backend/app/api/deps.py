@@ -1,16 +1,76 @@
+import hmac
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlmodel import Session, select
 
-from app.core.database import get_session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AnySession, get_session, run_db
+from app.core.revocation import revocations
 from app.core.security import decode_token
 from app.models import User, RevokedToken
 
 bearer = HTTPBearer(auto_error=True)
+ops_bearer = HTTPBearer(auto_error=False)
+
+# jti -> detached User. Entries never outlive the token's own `exp`.
+principal_cache = TTLCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+def require_ops_token(creds: HTTPAuthorizationCredentials | None = Depends(ops_bearer)) -> None:
+    """Gate for /metrics and /ops/*: hidden unless OPS_TOKEN is set, then that token is required."""
+    if not settings.ops_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if creds is None or not hmac.compare_digest(creds.credentials.encode(), settings.ops_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid ops token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def invalidate_token(jti: str) -> None:
+    principal_cache.pop(jti)
+
+
+def invalidate_user(user_id: int) -> None:
+    principal_cache.pop_where(lambda u: u.id == user_id)
+
+
+@event.listens_for(User, "after_delete")
+def _on_user_deleted(mapper, connection, target: User) -> None:
+    if target.id is not None:
+        invalidate_user(target.id)
+
+
+def _detached_copy(user: User) -> User:
+    return User(
+        id=user.id,
+        email=user.email,
+        password_hash=user.password_hash,
+        created_at=user.created_at,
+    )
 
-def get_current_user(
+
+def _revoked_in_table(session: Session, jti: str) -> bool:
+    return session.exec(select(RevokedToken.id).where(RevokedToken.jti == jti)).first() is not None
+
+
+def _load_principal(session: Session, jti: str, user_email: str) -> User:
+    user = session.exec(select(User).where(User.email == user_email)).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return _detached_copy(user)
+
+
+async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
-    session: Session = Depends(get_session),
+    session: AnySession = Depends(get_session),
 ) -> User:
     token = creds.credentials
     try:
@@ -22,12 +82,16 @@ def get_current_user(
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    revoked = session.exec(select(RevokedToken).where(RevokedToken.jti == jti)).first()
-    if revoked:
+    # The in-memory set lags other workers' logouts by up to REVOCATION_SYNC_SECONDS;
+    # before its first load, or with sync off, the table is asked too.
+    if jti in revocations or (not revocations.authoritative and await run_db(session, _revoked_in_table, jti)):
+        principal_cache.pop(jti)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
 
-    user = session.exec(select(User).where(User.email == user_email)).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    cached = principal_cache.get(jti)
+    if cached is not None:
+        return cached
 
+    user = await run_db(session, _load_principal, jti, user_email)
+    principal_cache.set(jti, user, expires_at=payload.get("exp"))
     return user
@@ -1,3 +1,5 @@
 from .auth import router as auth_router
 from .todos import router as todos_router
 from .chat import router as chat_router
+from .ops import router as ops_router
+from .metrics import router as metrics_router
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlmodel import Session, select, update
 
-from app.core.database import get_session
+from app.api.deps import invalidate_token
+from app.core.database import AnySession, get_session, run_db
+from app.core.revocation import revocations
 from app.core.security import (
+    PasswordHashBusy,
     hash_password,
-    verify_password,
+    hash_pool,
+    verify_and_update_password,
     create_access_token,
     decode_token,
 )
@@ -18,14 +22,50 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 bearer = HTTPBearer(auto_error=True)
 
 
+def _find_user(session: Session, email: str) -> User | None:
+    return session.exec(
+        select(User).where(User.email == email)
+    ).first()
+
+
+def _create_user(session: Session, email: str, password_hash: str) -> None:
+    session.add(User(email=email, password_hash=password_hash))
+    session.commit()
+
+
+async def _hash_work(fn, *args):
+    # Argon2 runs on its own bounded pool; when that is full, push back
+    try:
+        return await hash_pool.run(fn, *args)
+    except PasswordHashBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-in attempts right now, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _store_password_hash(session: Session, user_id: int, password_hash: str) -> None:
+    session.exec(update(User).where(User.id == user_id).values(password_hash=password_hash))
+    session.commit()
+
+
+def _revoke(session: Session, jti: str) -> None:
+    exists = session.exec(
+        select(RevokedToken).where(RevokedToken.jti == jti)
+    ).first()
+
+    if not exists:
+        session.add(RevokedToken(jti=jti))
+        session.commit()
+
+
 @router.post("/signup", response_model=TokenOut, status_code=201)
-def signup(payload: SignupIn, session: Session = Depends(get_session)):
+async def signup(payload: SignupIn, session: AnySession = Depends(get_session)):
     # TEMPORARY DEBUG LINE
     print("PASSWORD BYTES:", len(payload.password.encode("utf-8")))
 
-    existing = session.exec(
-        select(User).where(User.email == payload.email)
-    ).first()
+    existing = await run_db(session, _find_user, payload.email)
 
     if existing:
         raise HTTPException(
@@ -33,13 +73,8 @@ def signup(payload: SignupIn, session: Session = Depends(get_session)):
             detail="Email already registered"
         )
 
-    user = User(
-        email=payload.email,
-        password_hash=hash_password(payload.password)
-    )
-
-    session.add(user)
-    session.commit()
+    password_hash = await _hash_work(hash_password, payload.password)
+    await run_db(session, _create_user, payload.email, password_hash)
 
     token = create_access_token(
         subject=payload.email,
@@ -50,17 +85,24 @@ def signup(payload: SignupIn, session: Session = Depends(get_session)):
 
 
 @router.post("/", response_model=TokenOut)
-def login(payload: LoginIn, session: Session = Depends(get_session)):
-    user = session.exec(
-        select(User).where(User.email == payload.email)
-    ).first()
+async def login(payload: LoginIn, session: AnySession = Depends(get_session)):
+    user = await run_db(session, _find_user, payload.email)
 
-    if not user or not verify_password(payload.password, user.password_hash):
+    valid, new_hash = (
+        await _hash_work(verify_and_update_password, payload.password, user.password_hash)
+        if user
+        else (False, None)
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
 
+    if new_hash:
+        # Argon2 costs changed since this hash was made: upgrade it in place
+        await run_db(session, _store_password_hash, user.id, new_hash)
+
     token = create_access_token(
         subject=user.email,
         expires_minutes=settings.jwt_expire_minutes
@@ -70,9 +112,9 @@ def login(payload: LoginIn, session: Session = Depends(get_session)):
 
 
 @router.post("/logout")
-def logout(
+async def logout(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
-    session: Session = Depends(get_session),
+    session: AnySession = Depends(get_session),
 ):
     token = creds.credentials
 
@@ -84,12 +126,9 @@ def logout(
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    exists = session.exec(
-        select(RevokedToken).where(RevokedToken.jti == jti)
-    ).first()
+    await run_db(session, _revoke, jti)
 
-    if not exists:
-        session.add(RevokedToken(jti=jti))
-        session.commit()
+    revocations.add(jti)
+    invalidate_token(jti)
 
     return {"message": "Logged out"}
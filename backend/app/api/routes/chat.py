@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import hashlib
 import json
-import re
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, delete, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import Session, select, delete, not_
 
-from app.core.database import get_session
+from app.core.database import AnySession, get_session, run_db
 from app.api.deps import get_current_user
+from app.api.export import FORMAT_PATTERN, export_response
 from app.core.config import settings
+from app.core.metrics import CHAT_INTENTS
 from app.models import User, Todo, ChatMessage
+from app.services.intent import Parsed, human_list, parse_intent_fast
+from app.services.intent_cache import IntentCache
+from app.services.llm import LLMNotConfigured, LLMUnavailable, llm
+from app.services import todo_stats
+from app.services.ordinals import TodoOrdinals, TodoSnapshot
+from app.services.search import mark_changed, todo_search
 from app.schemas.chat import ChatIn, ChatOut
 
-import google.generativeai as genai
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -21,56 +28,14 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 # =========================================================
 # Local numbering helpers (Todo 1..N per user)
 # =========================================================
-def _get_user_todos(session: Session, user_id: int) -> List[Todo]:
-    return session.exec(
-        select(Todo).where(Todo.user_id == user_id).order_by(Todo.id.asc())
-    ).all()
-
-
-def _resolve_local_to_db_id(
-    session: Session, user_id: int, local_no: Optional[int]
-) -> Optional[int]:
-    if not local_no or local_no <= 0:
-        return None
-    todos = _get_user_todos(session, user_id)
-    if local_no > len(todos):
-        return None
-    return todos[local_no - 1].id
-
-
-def _resolve_many_local_to_db_ids(
-    session: Session, user_id: int, local_nos: List[int]
-) -> List[int]:
-    todos = _get_user_todos(session, user_id)
-    out: List[int] = []
-    for n in sorted(set(local_nos)):
-        if 1 <= n <= len(todos):
-            out.append(todos[n - 1].id)
-    return out
-
-
 def _has_attr(obj: Any, name: str) -> bool:
     return hasattr(obj, name)
 
 
-def _human_list(nums: List[int]) -> str:
-    nums = sorted(set(nums))
-    if not nums:
-        return ""
-    if len(nums) == 1:
-        return str(nums[0])
-    if len(nums) == 2:
-        return f"{nums[0]} and {nums[1]}"
-    return ", ".join(map(str, nums[:-1])) + f", and {nums[-1]}"
-
-
-def format_todos_for_user(session: Session, user_id: int, todos: List[Todo]) -> str:
+def format_todos_for_user(ordinals: TodoOrdinals, todos: List[Todo]) -> str:
     if not todos:
         return "No todos found."
 
-    all_todos = _get_user_todos(session, user_id)
-    local_map = {t.id: i + 1 for i, t in enumerate(all_todos)}
-
     lines: List[str] = []
     for t in todos:
         mark = "✅" if getattr(t, "completed", False) else "⏳"
@@ -79,630 +44,11 @@ def format_todos_for_user(session: Session, user_id: int, todos: List[Todo]) ->
         if _has_attr(t, "priority") and getattr(t, "priority", None) is not None:
             pr = f" [p{getattr(t, 'priority')}]"
 
-        lines.append(f"{mark} Todo {local_map.get(t.id, '?')}{pr}: {t.title}{desc}")
+        lines.append(f"{mark} Todo {ordinals.local_no(t.id) or '?'}{pr}: {t.title}{desc}")
 
     return "\n".join(lines)
 
 
-# =========================================================
-# Parsing utilities
-# =========================================================
-def _extract_all_ints(text: str) -> List[int]:
-    return [int(x) for x in re.findall(r"\b(\d+)\b", text)]
-
-
-def _extract_ranges_and_lists(text: str) -> List[int]:
-    """
-    Supports:
-      - "1 to 4", "1-4"
-      - "3, 5, and 7"
-      - "todo 2"
-      - "delete 2"
-    """
-    t = text.lower()
-    out: List[int] = []
-
-    for a, b in re.findall(r"\b(\d+)\s*(?:to|-)\s*(\d+)\b", t):
-        start, end = int(a), int(b)
-        if start <= end:
-            out.extend(list(range(start, end + 1)))
-        else:
-            out.extend(list(range(end, start + 1)))
-
-    out.extend(_extract_all_ints(t))
-    return sorted(set(out))
-
-
-def _extract_ordinal_refs(text: str) -> Optional[int]:
-    """
-    Supports:
-      - "last", "second last"
-      - "2nd", "third"
-    Returns local index; negative means from end.
-    """
-    t = text.lower().strip()
-
-    if "second last" in t or "2nd last" in t or "second-last" in t:
-        return -2
-    if "last" in t or "latest" in t:
-        return -1
-
-    m = re.search(r"\b(\d+)(st|nd|rd|th)\b", t)
-    if m:
-        return int(m.group(1))
-
-    words = {
-        "first": 1,
-        "second": 2,
-        "third": 3,
-        "fourth": 4,
-        "fifth": 5,
-    }
-    for k, v in words.items():
-        if re.search(rf"\b{k}\b", t):
-            return v
-    return None
-
-
-def _split_multi_items(text: str) -> List[str]:
-    """
-    For: "Add 3 todos: buy milk, buy eggs, buy bread"
-    """
-    if ":" in text:
-        after = text.split(":", 1)[1].strip()
-        parts = [p.strip(" '\"\n\t") for p in after.split(",") if p.strip()]
-        return parts
-
-    m = re.search(r"\badd\s+\d+\s+todos?\b(.+)$", text, flags=re.I)
-    if m:
-        after = m.group(1)
-        parts = [p.strip(" '\"\n\t") for p in after.split(",") if p.strip()]
-        return parts
-
-    return []
-
-
-# =========================================================
-# Intent parser (English questions only)
-# Returns multi-actions (e.g., "delete todo 2 and show remaining todos")
-# =========================================================
-Parsed = Tuple[str, Dict[str, Any]]  # (action, payload)
-
-
-def parse_intent_fast(text: str) -> List[Parsed]:
-    raw = re.sub(r"\s+", " ", text.strip())
-    t = raw.lower()
-
-    # -------------------------------------------------
-    # CHAINING HELPERS (and show/list)
-    # -------------------------------------------------
-    wants_show_after = False
-    if re.search(r"\b(and|then)\s+(show|list)\b", t):
-        wants_show_after = True
-
-    # -------------------------
-    # Status: "todo 1 is completed/incomplete/done/pending"
-    # Also: "I've completed todo 3", "task 2 is done"
-    # -------------------------
-    m_status = re.search(
-        r"\b(?:todo|task)\s+(\d+)\s+is\s+(completed|done|finished|pending|incomplete|not done|undone)\b",
-        t,
-    )
-    if m_status:
-        local_no = int(m_status.group(1))
-        word = m_status.group(2)
-        completed = True
-        if word in ["pending", "incomplete", "not done", "undone"]:
-            completed = False
-        actions: List[Parsed] = [("complete_many", {"local_nos": [local_no], "completed": completed})]
-        if wants_show_after:
-            actions.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-        return actions
-
-    m_status2 = re.search(
-        r"\b(i[' ]?ve|i have|i)\s+(completed|done with|finished)\s+(?:todo|task)\s+(\d+)\b",
-        t,
-    )
-    if m_status2:
-        local_no = int(m_status2.group(3))
-        actions: List[Parsed] = [("complete_many", {"local_nos": [local_no], "completed": True})]
-        if wants_show_after:
-            actions.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-        return actions
-
-    # -------------------------
-    # Latest/last todo quick detail
-    # -------------------------
-    if "latest todo" in t or "my latest todo" in t or "last todo" in t or "my last todo" in t:
-        return [("details", {"ordinal": -1})]
-
-    # -------------------------
-    # Show todo number 3 / show todo 3
-    # -------------------------
-    m_show_one = re.search(r"\bshow\s+(?:todo|task)\s+(?:number\s+)?(\d+)\b", t)
-    if m_show_one:
-        return [("details", {"local_nos": [int(m_show_one.group(1))]})]
-
-    # -------------------------
-    # Show first 5 todos
-    # -------------------------
-    m_first_n = re.search(r"\bshow\s+first\s+(\d+)\s+(?:todos|tasks)\b", t)
-    if m_first_n:
-        n = max(1, int(m_first_n.group(1)))
-        return [("list", {"filter": "all", "priority": None, "sort_by": "created", "sort_dir": "asc", "limit": n})]
-
-    # -------------------------
-    # Which todo has title/description?
-    # -------------------------
-    if any(k in t for k in ["which todo", "which task"]):
-        m = re.search(
-            r"(?:title)\s*(?:is|=|:)?\s*['\"]?(.+?)['\"]?\??$",
-            raw,
-            flags=re.I,
-        )
-        if not m:
-            m = re.search(
-                r"(?:desc|description|details)\s*(?:is|=|:)?\s*['\"]?(.+?)['\"]?\??$",
-                raw,
-                flags=re.I,
-            )
-        if m:
-            q = m.group(1).strip()
-            return [("search", {"query": q})]
-
-        m2 = re.search(
-            r"(?:which\s+(?:todo|task))\s+(?:has|contains|include|mentions)\s+['\"]?(.+?)['\"]?\??$",
-            raw,
-            flags=re.I,
-        )
-        if m2:
-            q = m2.group(1).strip()
-            return [("search", {"query": q})]
-
-        return [("clarify", {"message": "What title/description should I look for?"})]
-
-    # -------------------------
-    # Search / Find
-    # -------------------------
-    if t.startswith(("find", "search")) or "do i have any todo" in t:
-        m = re.search(
-            r"(?:find|search)\s+(?:todos?|tasks?)\s*(?:related to|with word|containing|that contain)?\s*['\"]?(.+?)['\"]?$",
-            raw,
-            flags=re.I,
-        )
-        q = (m.group(1).strip() if m else "").strip()
-        if not q:
-            m2 = re.search(
-                r"do i have any todos?\s+(?:for|about)\s+(.+)\??$", raw, flags=re.I
-            )
-            q = m2.group(1).strip() if m2 else ""
-        return [("search", {"query": q})]
-
-    # -------------------------
-    # Delete all / clear
-    # -------------------------
-    if any(
-        k in t
-        for k in [
-            "delete all",
-            "clear my todo",
-            "clear my list",
-            "remove everything",
-            "delete everything",
-        ]
-    ):
-        return [("delete_all", {})]
-
-    # -------------------------
-    # Delete filtered
-    # -------------------------
-    if "delete all completed" in t or "delete completed" in t:
-        return [("delete_filtered", {"filter": "completed"})]
-    if "delete all pending" in t or "delete pending" in t:
-        return [("delete_filtered", {"filter": "pending"})]
-
-    # -------------------------
-    # Count / Summary
-    # -------------------------
-    if any(k in t for k in ["how many", "count", "total"]) and any(
-        k in t for k in ["todo", "todos", "task", "tasks"]
-    ):
-        if "completed" in t or "done" in t:
-            return [("count", {"filter": "completed"})]
-        if "pending" in t or "incomplete" in t:
-            return [("count", {"filter": "pending"})]
-        return [("count", {"filter": "all"})]
-
-    if "summary" in t and any(k in t for k in ["todo", "todos", "task", "tasks"]):
-        return [("summary", {})]
-
-    # -------------------------
-    # Details (extra)
-    # -------------------------
-    if t.startswith(("show details", "details of", "what is todo", "what is task")) or (
-        "which todo is number" in t
-    ):
-        nums = _extract_ranges_and_lists(t)
-        if nums:
-            return [("details", {"local_nos": nums})]
-        ordref = _extract_ordinal_refs(t)
-        if ordref:
-            return [("details", {"ordinal": ordref})]
-        return [("clarify", {"message": "Which todo number do you want details for?"})]
-
-    # -------------------------
-    # List / View with filters
-    # (Added: "anything pending", "what's on my list", "do i have any tasks")
-    # -------------------------
-    if any(
-        k in t
-        for k in [
-            "show",
-            "list",
-            "what do i have to do",
-            "my todo list",
-            "my todos",
-            "todo list",
-            "do i have any tasks",
-            "what’s on my list",
-            "what's on my list",
-            "anything pending",
-            "anything left",
-        ]
-    ) and not t.startswith(
-        (
-            "add",
-            "create",
-            "make",
-            "delete",
-            "remove",
-            "update",
-            "patch",
-            "edit",
-            "change",
-            "mark",
-            "toggle",
-            "complete",
-            "uncomplete",
-            "reopen",
-            "rename",
-        )
-    ):
-        flt = "all"
-        if "completed" in t or "done" in t:
-            flt = "completed"
-        elif "pending" in t or "incomplete" in t:
-            flt = "pending"
-
-        priority = None
-        if "high priority" in t or "highest priority" in t:
-            priority = "high"
-
-        sort_by = None
-        sort_dir = None
-        if "sort" in t:
-            sort_by = "created"
-            if "status" in t:
-                sort_by = "status"
-            if "priority" in t:
-                sort_by = "priority"
-            sort_dir = "desc" if ("descending" in t or "desc" in t) else "asc"
-
-        return [
-            (
-                "list",
-                {
-                    "filter": flt,
-                    "priority": priority,
-                    "sort_by": sort_by,
-                    "sort_dir": sort_dir,
-                    "limit": None,
-                },
-            )
-        ]
-
-    # -------------------------
-    # Add / Create (supports natural phrasing)
-    # + chain "and show my list"
-    # -------------------------
-    if t.startswith(("add", "create", "make")) or any(
-        k in t for k in ["remind me to", "i need to", "i have to", "put", "add "]
-    ):
-        multi_items = _split_multi_items(raw)
-        if multi_items:
-            acts: List[Parsed] = [("add_many", {"items": multi_items})]
-            if wants_show_after:
-                acts.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-            return acts
-
-        title = None
-        desc = None
-
-        m_title = re.search(
-            r"(?:title)\s*(?::|=|is|should be)\s*['\"]?(.+?)['\"]?(?:\s+(?:and\s+)?(?:desc|description|details)\s*(?::|=|is|should be)\s*|$)",
-            raw,
-            flags=re.I,
-        )
-        m_desc = re.search(
-            r"(?:desc|description|details)\s*(?::|=|is|should be)\s*['\"]?(.+?)['\"]?$",
-            raw,
-            flags=re.I,
-        )
-        if m_title:
-            title = m_title.group(1).strip()
-        if m_desc:
-            desc = m_desc.group(1).strip()
-
-        if not title:
-            m = re.search(r"remind me to\s+(.+)$", raw, flags=re.I)
-            if m:
-                title = m.group(1).strip()
-
-        if not title and any(k in t for k in ["i need to", "i have to"]):
-            m = re.search(r"(?:i need to|i have to)\s+(.+)$", raw, flags=re.I)
-            if m:
-                title = m.group(1).strip()
-
-        if not title and "add" in t:
-            if ":" in raw:
-                title = raw.split(":", 1)[1].strip().strip("'\"")
-            else:
-                m = re.search(
-                    r"\badd\b\s+['\"]?(.+?)['\"]?(?:\s+to\s+my\s+todo\s+list)?$",
-                    raw,
-                    flags=re.I,
-                )
-                if m:
-                    title = m.group(1).strip().strip("'\"")
-
-        acts: List[Parsed] = [("add", {"title": title or "", "description": desc})]
-        if wants_show_after:
-            acts.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-        return acts
-
-    # -------------------------
-    # Status updates (existing + improved)
-    # Now also covers: "task 3 is done" already above
-    # -------------------------
-    if t.startswith(
-        ("mark", "complete", "uncomplete", "incomplete", "reopen", "toggle")
-    ) or "mark all todos as completed" in t:
-        if "mark all" in t and ("completed" in t or "done" in t):
-            return [("complete_all", {"completed": True})]
-        if "mark all" in t and ("pending" in t or "incomplete" in t or "reopen" in t):
-            return [("complete_all", {"completed": False})]
-
-        local_nos = _extract_ranges_and_lists(t)
-        if not local_nos:
-            ordref = _extract_ordinal_refs(t)
-            if ordref:
-                return [
-                    (
-                        "status_by_ordinal",
-                        {
-                            "ordinal": ordref,
-                            "mode": "toggle" if t.startswith("toggle") else "set",
-                            "completed": None,
-                        },
-                    )
-                ]
-            return [("clarify", {"message": "Which todo do you want to mark done/undone?"})]
-
-        if t.startswith("toggle"):
-            return [("toggle_many", {"local_nos": local_nos})]
-
-        if "reopen" in t or "uncomplete" in t or "incomplete" in t:
-            return [("complete_many", {"local_nos": local_nos, "completed": False})]
-
-        return [("complete_many", {"local_nos": local_nos, "completed": True})]
-
-    # -------------------------
-    # Delete (supports: "delete 2", "delete todo 2", "remove task 3")
-    # + chain "and show remaining todos"
-    # -------------------------
-    if t.startswith(("delete", "remove")):
-        nums = _extract_ranges_and_lists(t)
-        if nums:
-            acts: List[Parsed] = [("delete_many", {"local_nos": nums})]
-            if wants_show_after:
-                acts.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-            return acts
-
-        ordref = _extract_ordinal_refs(t)
-        if ordref:
-            acts2: List[Parsed] = [("delete_by_ordinal", {"ordinal": ordref})]
-            if wants_show_after:
-                acts2.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-            return acts2
-
-        m = re.search(
-            r"(?:delete|remove)\s+(?:the\s+)?(.+?)\s+(?:todo|task)\b", raw, flags=re.I
-        )
-        if m:
-            acts3: List[Parsed] = [("delete_by_text", {"query": m.group(1).strip()})]
-            if wants_show_after:
-                acts3.append(("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None}))
-            return acts3
-
-        return [("clarify", {"message": "Which todo number do you want to delete? Example: Delete todo 3"})]
-
-    # -------------------------
-    # Update / Patch (same as your code + keeps "Add this description: X to todo 3")
-    # -------------------------
-    if t.startswith(("update", "patch", "edit", "change", "rename")):
-        # "Add this description: X to todo 3"
-        m_add_desc = re.search(
-            r"(?:add|set)\s+(?:this\s+)?(?:desc|description|details)\s*(?::|=)?\s*['\"]?(.+?)['\"]?\s+(?:to|for|in)\s+(?:todo|task)\s+(\d+)\b",
-            raw,
-            flags=re.I,
-        )
-        if m_add_desc:
-            desc_text = m_add_desc.group(1).strip()
-            local_no = int(m_add_desc.group(2))
-            return [
-                (
-                    "patch_many",
-                    {
-                        "local_nos": [local_no],
-                        "title": None,
-                        "description": desc_text,
-                        "completed": None,
-                    },
-                )
-            ]
-
-        segments = re.split(r"\b(?:and|,)\b", raw, flags=re.I)
-        seg_actions: List[Parsed] = []
-
-        for seg in segments:
-            seg_t = seg.strip()
-            if not seg_t:
-                continue
-
-            seg_lower = seg_t.lower()
-            seg_nums = _extract_ranges_and_lists(seg_lower)
-            if not seg_nums:
-                continue
-
-            # status update
-            if (
-                "status" in seg_lower
-                or "completed" in seg_lower
-                or "done" in seg_lower
-                or "reopen" in seg_lower
-            ):
-                completed = True
-                if (
-                    "reopen" in seg_lower
-                    or "pending" in seg_lower
-                    or "incomplete" in seg_lower
-                ):
-                    completed = False
-                seg_actions.append(
-                    ("complete_many", {"local_nos": seg_nums, "completed": completed})
-                )
-                continue
-
-            title = None
-            desc = None
-            completed_field: Optional[bool] = None
-
-            m_title = re.search(
-                r"(?:title)\s*(?::|=|to|is|as|should be)\s*['\"]?(.+?)['\"]?(?:\s+(?:and\s+)?(?:desc|description|details)\b|$)",
-                seg_t,
-                flags=re.I,
-            )
-            m_desc = re.search(
-                r"(?:desc|description|details)\s*(?::|=|to|is|as|should be)\s*['\"]?(.+?)['\"]?$",
-                seg_t,
-                flags=re.I,
-            )
-            if m_title:
-                title = m_title.group(1).strip()
-            if m_desc:
-                desc = m_desc.group(1).strip()
-
-            if title is None and seg_lower.strip().startswith("rename"):
-                m = re.search(
-                    r"rename\s+(?:todo|task)?\s*\b(\d+)\b\s+(?:as|to)\s+['\"]?(.+?)['\"]?$",
-                    seg_t,
-                    flags=re.I,
-                )
-                if m:
-                    seg_nums = [int(m.group(1))]
-                    title = m.group(2).strip()
-
-            seg_actions.append(
-                (
-                    "patch_many",
-                    {
-                        "local_nos": seg_nums,
-                        "title": title,
-                        "description": desc,
-                        "completed": completed_field,
-                    },
-                )
-            )
-
-        if seg_actions:
-            return seg_actions
-
-        local_nos = _extract_ranges_and_lists(t)
-        if not local_nos:
-            ordref = _extract_ordinal_refs(t)
-            if ordref:
-                return [
-                    (
-                        "clarify",
-                        {
-                            "message": "Which fields should I update for that todo? (title / description / status)"
-                        },
-                    )
-                ]
-            return [
-                (
-                    "clarify",
-                    {
-                        "message": "Which todo do you want to update? Example: Update todo 3 title to 'Buy vegetables'"
-                    },
-                )
-            ]
-
-        title = None
-        desc = None
-
-        m_title = re.search(
-            r"(?:title)\s*(?::|=|to|is|as|should be)\s*['\"]?(.+?)['\"]?(?:\s+(?:and\s+)?(?:desc|description|details)\b|$)",
-            raw,
-            flags=re.I,
-        )
-        m_desc = re.search(
-            r"(?:desc|description|details)\s*(?::|=|to|is|as|should be)\s*['\"]?(.+?)['\"]?$",
-            raw,
-            flags=re.I,
-        )
-        if m_title:
-            title = m_title.group(1).strip()
-        if m_desc:
-            desc = m_desc.group(1).strip()
-
-        if desc is None and "more details" in t:
-            return [
-                (
-                    "clarify",
-                    {
-                        "message": f"What description should I set for todo(s) {_human_list(local_nos)}?"
-                    },
-                )
-            ]
-
-        return [
-            (
-                "patch_many",
-                {
-                    "local_nos": local_nos,
-                    "title": title,
-                    "description": desc,
-                    "completed": None,
-                },
-            )
-        ]
-
-    # -------------------------
-    # Group by status
-    # -------------------------
-    if "group" in t and "status" in t:
-        return [("group_by_status", {})]
-
-    # -------------------------
-    # Undo (common but not supported)
-    # -------------------------
-    if "undo" in t:
-        return [("clarify", {"message": "Undo is not implemented yet. Tell me what to revert (e.g., 'reopen todo 3' or 'restore title of todo 2')."})]
-
-    return [("unknown", {})]
-
-
 # =========================================================
 # Gemini fallback (ONLY when unknown)
 # =========================================================
@@ -751,26 +97,23 @@ Return JSON only.
 """.strip()
 
 
-def gemini_to_action(user_text: str) -> dict:
-    api_key = getattr(settings, "gemini_api_key", None) or getattr(
-        settings, "GEMINI_API_KEY", None
-    )
-    model_name = (
-        getattr(settings, "gemini_model", None)
-        or getattr(settings, "GEMINI_MODEL", None)
-        or "gemini-1.5-flash"
-    )
+# Entries are tied to this prompt and model; editing either starts a fresh cache.
+intent_cache = IntentCache(
+    namespace=f"{llm.default_model}:{hashlib.sha256(SYSTEM_INSTRUCTIONS.encode()).hexdigest()[:16]}",
+    max_entries=settings.intent_cache_max_entries,
+    ttl_seconds=settings.intent_cache_ttl_seconds,
+    persist=settings.intent_cache_persist,
+)
 
-    if not api_key:
-        raise HTTPException(
-            status_code=500, detail="Gemini API key is missing (check settings/.env)."
-        )
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel(model_name)
+async def gemini_to_action(user_text: str) -> dict:
+    # Raises LLMUnavailable when the deadline passes, the breaker is open or the
+    # upstream fails; a missing API key is a server misconfiguration (500)
+    try:
+        raw = await llm.generate_async(user_text, system_instruction=SYSTEM_INSTRUCTIONS)
+    except LLMNotConfigured as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-    resp = model.generate_content(SYSTEM_INSTRUCTIONS + "\nUser: " + user_text)
-    raw = (resp.text or "").strip()
     raw = raw.replace("```json", "").replace("```", "").strip()
 
     try:
@@ -891,67 +234,119 @@ def normalize_ai(ai: dict) -> List[Parsed]:
 # =========================================================
 # Routes
 # =========================================================
-@router.get("/history")
-def history(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    msgs = session.exec(
-        select(ChatMessage)
-        .where(ChatMessage.user_id == user.id)
-        .order_by(ChatMessage.id.asc())
-    ).all()
+MAX_HISTORY_PAGE = 200
+
+
+def _history(
+    session: Session,
+    user_id: int,
+    limit: Optional[int] = None,
+    before_id: Optional[int] = None,
+    since_id: Optional[int] = None,
+):
+    """
+    Keyset slice of the user's chat, always returned oldest first.
+
+    With since_id: the oldest `limit` messages after it (delta fetch); the
+    cursor is the last id, to pass as the next since_id. Otherwise: the
+    newest `limit` messages (before before_id, if given); the cursor is the
+    first id, to pass as before_id for the page before. The cursor is None
+    when nothing further exists.
+    """
+    q = select(ChatMessage.id, ChatMessage.role, ChatMessage.content).where(ChatMessage.user_id == user_id)
+    if before_id is not None:
+        q = q.where(ChatMessage.id < before_id)
+    if since_id is not None:
+        q = q.where(ChatMessage.id > since_id)
+
+    forward = since_id is not None or limit is None
+    q = q.order_by(ChatMessage.id.asc() if forward else ChatMessage.id.desc())
+    if limit is not None:
+        # one extra row tells us whether there is more
+        q = q.limit(limit + 1)
+
+    rows = session.exec(q).all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    if not forward:
+        rows.reverse()
 
     out = []
-    for m in msgs:
+    for m in rows:
         role = "assistant" if m.role in ["assistant", "bot"] else "user"
         out.append({"id": m.id, "role": role, "content": m.content})
-    return out
+    return out, next_cursor
+
+
+@router.get("/history")
+async def history(
+    response: Response,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_HISTORY_PAGE),
+    before_id: Optional[int] = Query(default=None, ge=1),
+    since_id: Optional[int] = Query(default=None, ge=0),
+    user: User = Depends(get_current_user),
+    session: AnySession = Depends(get_session),
+):
+    # Without parameters the whole history is returned, as before.
+    # Paged calls get the cursor for the next call in X-Next-Cursor.
+    items, next_cursor = await run_db(session, _history, user.id, limit, before_id, since_id)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return items
 
 
-def _apply_list_filters(q, flt: str, priority: Optional[str]):
+EXPORT_COLUMNS = ("id", "role", "content", "created_at")
+
+
+def _export_row(row) -> dict:
+    role = "assistant" if row.role in ["assistant", "bot"] else "user"
+    return {"id": row.id, "role": role, "content": row.content, "created_at": row.created_at}
+
+
+@router.get("/export")
+async def export_history(
+    fmt: str = Query(default="ndjson", alias="format", pattern=FORMAT_PATTERN),
+    user: User = Depends(get_current_user),
+):
+    # The whole conversation, oldest first, streamed rather than built in memory.
+    stmt = (
+        select(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+        .where(ChatMessage.user_id == user.id)
+        .order_by(ChatMessage.id.asc())
+    )
+    return export_response(stmt, EXPORT_COLUMNS, _export_row, fmt, "chat")
+
+
+def _apply_list_filters(todos: List[Todo], flt: str, priority: Optional[str]) -> List[Todo]:
     if flt == "completed":
-        q = q.where(Todo.completed == True)  # noqa
+        todos = [t for t in todos if t.completed]
     elif flt == "pending":
-        q = q.where(Todo.completed == False)  # noqa
+        todos = [t for t in todos if not t.completed]
 
     if priority and _has_attr(Todo, "priority"):
         if priority == "high":
-            q = q.where(Todo.priority <= 2)  # type: ignore[attr-defined]
+            todos = [t for t in todos if t.priority is not None and t.priority <= 2]  # type: ignore[attr-defined]
 
-    return q
+    return todos
 
 
-def _apply_sort(q, sort_by: Optional[str], sort_dir: Optional[str]):
+def _apply_sort(todos: List[Todo], sort_by: Optional[str], sort_dir: Optional[str]) -> List[Todo]:
     direction = (sort_dir or "asc").lower()
 
     if sort_by == "priority" and _has_attr(Todo, "priority"):
-        col = Todo.priority  # type: ignore[attr-defined]
+        key = lambda t: t.priority  # type: ignore[attr-defined]  # noqa: E731
     elif sort_by == "status":
-        col = Todo.completed
+        key = lambda t: t.completed  # noqa: E731
     else:
-        col = Todo.id
+        key = lambda t: t.id  # noqa: E731
 
-    if direction == "desc":
-        q = q.order_by(col.desc())  # type: ignore
-    else:
-        q = q.order_by(col.asc())  # type: ignore
-    return q
+    return sorted(todos, key=key, reverse=(direction == "desc"))
 
 
-def _ordinal_to_local_no(session: Session, user_id: int, ordinal: int) -> Optional[int]:
-    todos = _get_user_todos(session, user_id)
-    if not todos:
-        return None
-    if ordinal < 0:
-        idx = len(todos) + ordinal  # -1 => last
-        if 0 <= idx < len(todos):
-            return idx + 1
-        return None
-    if 1 <= ordinal <= len(todos):
-        return ordinal
-    return None
-
-
-def _summary_text(session: Session, user_id: int) -> str:
-    todos = _get_user_todos(session, user_id)
+def _summary_text(snapshot: TodoSnapshot) -> str:
+    todos = snapshot.todos
     total = len(todos)
     completed = len([t for t in todos if getattr(t, "completed", False)])
     pending = total - completed
@@ -960,31 +355,27 @@ def _summary_text(session: Session, user_id: int) -> str:
         f"- Total: {total}\n"
         f"- Completed: {completed}\n"
         f"- Pending: {pending}\n\n"
-        f"{format_todos_for_user(session, user_id, todos)}"
+        f"{format_todos_for_user(snapshot, todos)}"
     )
 
 
-@router.post("/message", response_model=ChatOut)
-def send_message(
-    data: ChatIn,
-    user: User = Depends(get_current_user),
-    session: Session = Depends(get_session),
-):
-    # Save user message
-    session.add(ChatMessage(user_id=user.id, role="user", content=data.message))
-    session.commit()
+def _handle_message(session: Session, user_id: int, text: str, actions: List[Parsed]) -> str:
+    """Save both chat messages and apply the actions in a single transaction."""
+    session.add(ChatMessage(user_id=user_id, role="user", content=text))
 
-    # 1) Fast parser
-    actions = parse_intent_fast(data.message)
+    snapshot = TodoSnapshot(session, user_id)
+    replies = _run_actions(snapshot, actions)
+    reply = "\n\n".join([r for r in replies if r.strip()]) or "Done."
+
+    session.add(ChatMessage(user_id=user_id, role="assistant", content=reply))
+    snapshot.commit()
+    return reply
 
-    # 2) Gemini fallback ONLY if unknown
-    if len(actions) == 1 and actions[0][0] == "unknown":
-        try:
-            ai = gemini_to_action(data.message)
-            actions = normalize_ai(ai)
-        except Exception:
-            actions = [("unknown", {})]
 
+def _run_actions(snapshot: TodoSnapshot, actions: List[Parsed]) -> List[str]:
+    """Apply parsed actions to the snapshot; the caller commits once at the end."""
+    session = snapshot.session
+    user_id = snapshot.user_id
     replies: List[str] = []
 
     for action, payload in actions:
@@ -999,13 +390,9 @@ def send_message(
                 replies.append("Please provide a title. Example: Add buy groceries")
                 continue
 
-            todo = Todo(user_id=user.id, title=title, description=desc)
-
-            session.add(todo)
-            session.commit()
-            session.refresh(todo)
+            todo = snapshot.create([(title, desc)])[0]
 
-            local_no = len(_get_user_todos(session, user.id))
+            local_no = snapshot.local_no(todo.id)
             msg = f"✅ Added Todo {local_no}\nTitle: {todo.title}"
             if getattr(todo, "description", None):
                 msg += f"\nDescription: {todo.description}"
@@ -1021,21 +408,14 @@ def send_message(
                 replies.append("What todos should I add?")
                 continue
 
-            added_nums: List[int] = []
-            for it in items:
-                title = str(it).strip()
-                if not title:
-                    continue
-                todo = Todo(user_id=user.id, title=title, description=None)
-                session.add(todo)
-                session.commit()
-                session.refresh(todo)
-                added_nums.append(len(_get_user_todos(session, user.id)))
+            titles = [str(it).strip() for it in items if str(it).strip()]
+            added = snapshot.create([(title, None) for title in titles]) if titles else []
+            added_nums: List[int] = [snapshot.local_no(t.id) for t in added]
 
             if not added_nums:
                 replies.append("I could not find valid todo titles to add.")
             else:
-                replies.append(f"✅ Added {len(added_nums)} todos: {_human_list(added_nums)}")
+                replies.append(f"✅ Added {len(added_nums)} todos: {human_list(added_nums)}")
             continue
 
         # -------------------------
@@ -1048,34 +428,30 @@ def send_message(
             sort_dir = payload.get("sort_dir")
             limit = payload.get("limit")
 
-            q = select(Todo).where(Todo.user_id == user.id)
-            q = _apply_list_filters(q, flt, priority)
+            todos = _apply_list_filters(snapshot.todos, flt, priority)
             if sort_by:
-                q = _apply_sort(q, sort_by, sort_dir)
-            else:
-                q = q.order_by(Todo.id.asc())
+                todos = _apply_sort(todos, sort_by, sort_dir)
 
-            todos = session.exec(q).all()
             if isinstance(limit, int) and limit > 0:
                 todos = todos[:limit]
 
-            replies.append(format_todos_for_user(session, user.id, todos))
+            replies.append(format_todos_for_user(snapshot, todos))
             continue
 
         # -------------------------
         # Group by status
         # -------------------------
         if action == "group_by_status":
-            todos = _get_user_todos(session, user.id)
+            todos = snapshot.todos
             done = [t for t in todos if getattr(t, "completed", False)]
             pending = [t for t in todos if not getattr(t, "completed", False)]
             replies.append(
                 "Pending:\n"
-                + (format_todos_for_user(session, user.id, pending) if pending else "No pending todos.")
+                + (format_todos_for_user(snapshot, pending) if pending else "No pending todos.")
             )
             replies.append(
                 "Completed:\n"
-                + (format_todos_for_user(session, user.id, done) if done else "No completed todos.")
+                + (format_todos_for_user(snapshot, done) if done else "No completed todos.")
             )
             continue
 
@@ -1084,22 +460,20 @@ def send_message(
         # -------------------------
         if action == "count":
             flt = payload.get("filter", "all")
-            todos = _get_user_todos(session, user.id)
+            total, done = todo_stats.counts(session, user_id)
             if flt == "completed":
-                n = len([t for t in todos if getattr(t, "completed", False)])
-                replies.append(f"📌 Completed todos: {n}")
+                replies.append(f"📌 Completed todos: {done}")
             elif flt == "pending":
-                n = len([t for t in todos if not getattr(t, "completed", False)])
-                replies.append(f"📌 Pending todos: {n}")
+                replies.append(f"📌 Pending todos: {total - done}")
             else:
-                replies.append(f"📌 Total todos: {len(todos)}")
+                replies.append(f"📌 Total todos: {total}")
             continue
 
         # -------------------------
         # Summary
         # -------------------------
         if action == "summary":
-            replies.append(_summary_text(session, user.id))
+            replies.append(_summary_text(snapshot))
             continue
 
         # -------------------------
@@ -1110,7 +484,7 @@ def send_message(
             ordinal = payload.get("ordinal")
 
             if ordinal is not None and isinstance(ordinal, int):
-                local = _ordinal_to_local_no(session, user.id, ordinal)
+                local = snapshot.from_ordinal(ordinal)
                 if not local:
                     replies.append("I could not find that todo.")
                     continue
@@ -1120,18 +494,14 @@ def send_message(
                 replies.append("Which todo number do you want details for?")
                 continue
 
-            db_ids = _resolve_many_local_to_db_ids(session, user.id, list(map(int, local_nos)))
+            db_ids = snapshot.db_ids(list(map(int, local_nos)))
             if not db_ids:
                 replies.append("No matching todos found.")
                 continue
 
-            found: List[Todo] = []
-            for db_id in db_ids:
-                todo = session.get(Todo, db_id)
-                if todo and todo.user_id == user.id:
-                    found.append(todo)
+            found = snapshot.rows(db_ids)
 
-            replies.append(format_todos_for_user(session, user.id, found))
+            replies.append(format_todos_for_user(snapshot, found))
             continue
 
         # -------------------------
@@ -1143,24 +513,13 @@ def send_message(
                 replies.append("What should I search for? Example: Search todos containing 'meeting'")
                 continue
 
-            q = (
-                select(Todo)
-                .where(Todo.user_id == user.id)
-                .where(
-                    or_(
-                        Todo.title.ilike(f"%{qtext}%"),
-                        Todo.description.ilike(f"%{qtext}%"),  # type: ignore
-                    )
-                )
-                .order_by(Todo.id.asc())
-            )
-
-            todos = session.exec(q).all()
+            # listed in todo-number order, like every other chat listing
+            todos = todo_search.search(session, user_id, qtext, ranked=False)
             if not todos:
                 replies.append(f"No todos matched: {qtext}")
             else:
                 replies.append(
-                    f"Search results for '{qtext}':\n" + format_todos_for_user(session, user.id, todos)
+                    f"Search results for '{qtext}':\n" + format_todos_for_user(snapshot, todos)
                 )
             continue
 
@@ -1179,21 +538,24 @@ def send_message(
 
             if title is None and desc is None and completed is None:
                 replies.append(
-                    f"What should I update for todo(s) {_human_list(local_nos)}? (title / description / status)"
+                    f"What should I update for todo(s) {human_list(local_nos)}? (title / description / status)"
                 )
                 continue
 
-            db_ids = _resolve_many_local_to_db_ids(session, user.id, local_nos)
+            db_ids = snapshot.db_ids(local_nos)
             if not db_ids:
                 replies.append("No matching todos found.")
                 continue
 
-            updated: List[Todo] = []
-            for db_id in db_ids:
-                todo = session.get(Todo, db_id)
-                if not todo or todo.user_id != user.id:
-                    continue
+            if title is not None or desc is not None:
+                mark_changed(session, user_id)
+
+            if completed is not None:
+                # through update_where, so the stats delta is what the UPDATE changed
+                snapshot.update_where({"completed": bool(completed)}, Todo.id.in_(db_ids), returning=False)
 
+            updated: List[Todo] = []
+            for todo in snapshot.rows(db_ids):
                 if title is not None:
                     new_title = str(title).strip()
                     if new_title:
@@ -1203,18 +565,12 @@ def send_message(
                     new_desc = str(desc).strip()
                     todo.description = new_desc if new_desc else None
 
-                if completed is not None:
-                    todo.completed = bool(completed)
-
-                session.add(todo)
                 updated.append(todo)
 
-            session.commit()
-
             if not updated:
                 replies.append("No todos were updated.")
             else:
-                replies.append("✅ Updated:\n" + format_todos_for_user(session, user.id, updated))
+                replies.append("✅ Updated:\n" + format_todos_for_user(snapshot, updated))
             continue
 
         # -------------------------
@@ -1226,21 +582,14 @@ def send_message(
                 replies.append("Which todo do you want to mark done/undone?")
                 continue
 
-            db_ids = _resolve_many_local_to_db_ids(session, user.id, local_nos)
+            db_ids = snapshot.db_ids(local_nos)
             if not db_ids:
                 replies.append("No matching todos found.")
                 continue
 
             new_val = bool(payload.get("completed", True))
-            changed: List[Todo] = []
-            for db_id in db_ids:
-                todo = session.get(Todo, db_id)
-                if todo and todo.user_id == user.id:
-                    todo.completed = new_val
-                    session.add(todo)
-                    changed.append(todo)
-            session.commit()
-            replies.append("✅ Updated status:\n" + format_todos_for_user(session, user.id, changed))
+            changed = snapshot.update_where({"completed": new_val}, Todo.id.in_(db_ids))
+            replies.append("✅ Updated status:\n" + format_todos_for_user(snapshot, changed))
             continue
 
         if action == "toggle_many":
@@ -1249,29 +598,20 @@ def send_message(
                 replies.append("Which todo do you want to toggle?")
                 continue
 
-            db_ids = _resolve_many_local_to_db_ids(session, user.id, local_nos)
+            db_ids = snapshot.db_ids(local_nos)
             if not db_ids:
                 replies.append("No matching todos found.")
                 continue
 
-            changed: List[Todo] = []
-            for db_id in db_ids:
-                todo = session.get(Todo, db_id)
-                if todo and todo.user_id == user.id:
-                    todo.completed = not bool(todo.completed)
-                    session.add(todo)
-                    changed.append(todo)
-            session.commit()
-            replies.append("✅ Toggled status:\n" + format_todos_for_user(session, user.id, changed))
+            changed = snapshot.update_where({"completed": not_(Todo.completed)}, Todo.id.in_(db_ids))
+            replies.append("✅ Toggled status:\n" + format_todos_for_user(snapshot, changed))
             continue
 
         if action == "complete_all":
-            todos = _get_user_todos(session, user.id)
             desired = bool(payload.get("completed", True))
-            for todo in todos:
-                todo.completed = desired
-                session.add(todo)
-            session.commit()
+            snapshot.update_where(
+                {"completed": desired}, Todo.completed != desired, returning=False
+            )
             replies.append(f"✅ Marked all todos as {'completed' if desired else 'pending'}.")
             continue
 
@@ -1284,26 +624,17 @@ def send_message(
                 replies.append("Which todo number do you want to delete? Example: Delete todo 3")
                 continue
 
-            all_todos = _get_user_todos(session, user.id)
-            local_map = {t.id: i + 1 for i, t in enumerate(all_todos)}
-
-            db_ids = _resolve_many_local_to_db_ids(session, user.id, local_nos)
+            db_ids = snapshot.db_ids(local_nos)
             if not db_ids:
                 replies.append("No matching todos found.")
                 continue
 
-            deleted_local: List[int] = []
-            for db_id in db_ids:
-                todo = session.get(Todo, db_id)
-                if todo and todo.user_id == user.id:
-                    deleted_local.append(local_map.get(todo.id, -1))
-                    session.delete(todo)
-
-            session.commit()
+            deleted_local: List[int] = [snapshot.local_no(i) or -1 for i in db_ids]
+            snapshot.delete_where(Todo.id.in_(db_ids))
 
             deleted_local = [x for x in deleted_local if x > 0]
             if deleted_local:
-                replies.append(f"🗑️ Deleted todo(s): {_human_list(deleted_local)}")
+                replies.append(f"🗑️ Deleted todo(s): {human_list(deleted_local)}")
             else:
                 replies.append("No todos were deleted.")
             continue
@@ -1311,7 +642,7 @@ def send_message(
         if action == "delete_by_ordinal":
             ordinal = payload.get("ordinal")
             local = (
-                _ordinal_to_local_no(session, user.id, int(ordinal))
+                snapshot.from_ordinal(int(ordinal))
                 if isinstance(ordinal, int)
                 else None
             )
@@ -1319,13 +650,10 @@ def send_message(
                 replies.append("I could not find that todo.")
                 continue
 
-            db_id = _resolve_local_to_db_id(session, user.id, local)
-            todo = session.get(Todo, db_id) if db_id else None
-            if not todo or todo.user_id != user.id:
+            db_id = snapshot.db_id(local)
+            if not db_id or not snapshot.delete_where(Todo.id == db_id):
                 replies.append("Todo not found.")
                 continue
-            session.delete(todo)
-            session.commit()
             replies.append(f"🗑️ Deleted Todo {local}.")
             continue
 
@@ -1335,60 +663,40 @@ def send_message(
                 replies.append("Which todo should I delete? Example: Delete the grocery todo")
                 continue
 
-            q = (
-                select(Todo)
-                .where(Todo.user_id == user.id)
-                .where(
-                    or_(
-                        Todo.title.ilike(f"%{qtext}%"),
-                        Todo.description.ilike(f"%{qtext}%"),  # type: ignore
-                    )
-                )
-                .order_by(Todo.id.asc())
-            )
-            todos = session.exec(q).all()
-
-            if not todos:
+            # numbers are taken before the rows go away
+            numbering = {db_id: n for n, db_id in enumerate(snapshot.ids, start=1)}
+            matches = [t.id for t in todo_search.search(session, user_id, qtext, ranked=False)]
+            gone = snapshot.delete_where(Todo.id.in_(matches)) if matches else []
+            if not gone:
                 replies.append(f"No todos matched: {qtext}")
                 continue
 
-            all_todos = _get_user_todos(session, user.id)
-            local_map = {t.id: i + 1 for i, t in enumerate(all_todos)}
-
-            deleted_local: List[int] = []
-            for td in todos:
-                deleted_local.append(local_map.get(td.id, -1))
-                session.delete(td)
-
-            session.commit()
+            deleted_local: List[int] = [numbering[i] for i in gone]
 
             deleted_local = [x for x in deleted_local if x > 0]
-            replies.append(f"🗑️ Deleted todo(s): {_human_list(deleted_local)}")
+            replies.append(f"🗑️ Deleted todo(s): {human_list(deleted_local)}")
             continue
 
         if action == "delete_filtered":
             flt = payload.get("filter", "completed")
 
-            q = select(Todo).where(Todo.user_id == user.id)
+            criteria = []
             if flt == "completed":
-                q = q.where(Todo.completed == True)  # noqa
+                criteria.append(Todo.completed == True)  # noqa: E712
             elif flt == "pending":
-                q = q.where(Todo.completed == False)  # noqa
+                criteria.append(Todo.completed == False)  # noqa: E712
 
-            todos = session.exec(q).all()
-            if not todos:
+            gone = snapshot.delete_where(*criteria)
+            if not gone:
                 replies.append(f"No {flt} todos to delete.")
                 continue
 
-            for td in todos:
-                session.delete(td)
-            session.commit()
-            replies.append(f"🗑️ Deleted all {flt} todos ({len(todos)}).")
+            replies.append(f"🗑️ Deleted all {flt} todos ({len(gone)}).")
             continue
 
         if action == "delete_all":
-            session.exec(delete(Todo).where(Todo.user_id == user.id))
-            session.commit()
+            snapshot.delete_where()
+            snapshot.clear()
             replies.append("🗑️ Deleted all todos.")
             continue
 
@@ -1420,16 +728,49 @@ def send_message(
             )
             continue
 
-    reply = "\n\n".join([r for r in replies if r.strip()]) or "Done."
+    return replies
 
-    session.add(ChatMessage(user_id=user.id, role="assistant", content=reply))
-    session.commit()
 
+@router.post("/message", response_model=ChatOut)
+async def send_message(
+    data: ChatIn,
+    user: User = Depends(get_current_user),
+    session: AnySession = Depends(get_session),
+):
+    # 1) Fast parser
+    actions = parse_intent_fast(data.message)
+    source = "rules"
+
+    # 2) Gemini fallback ONLY if unknown, unless this phrasing was parsed before
+    if len(actions) == 1 and actions[0][0] == "unknown":
+        cached = intent_cache.get(data.message)
+        if cached is None and intent_cache.persist:
+            cached = await run_db(session, intent_cache.load, data.message)
+        if cached is not None:
+            actions = cached
+            source = "cache"
+        else:
+            source = "llm"
+            try:
+                ai = await gemini_to_action(data.message)
+                actions = normalize_ai(ai)
+            except LLMUnavailable:
+                # slow/failing upstream: answer with the help text right away
+                actions = [("unknown", {})]
+            if intent_cache.put(data.message, actions) and intent_cache.persist:
+                await run_db(session, intent_cache.save, data.message, actions)
+
+    CHAT_INTENTS.inc(source)
+    reply = await run_db(session, _handle_message, user.id, data.message, actions)
     return ChatOut(message=reply)
 
 
-@router.delete("/clear")
-def clear_chat(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    session.exec(delete(ChatMessage).where(ChatMessage.user_id == user.id))
+def _clear_chat(session: Session, user_id: int) -> None:
+    session.exec(delete(ChatMessage).where(ChatMessage.user_id == user_id))
     session.commit()
+
+
+@router.delete("/clear")
+async def clear_chat(user: User = Depends(get_current_user), session: AnySession = Depends(get_session)):
+    await run_db(session, _clear_chat, user.id)
     return {"detail": "Chat cleared."}
\ No newline at end of file
@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import principal_cache, require_ops_token
+from app.api.routes.chat import intent_cache
+from app.core.database import pool_stats
+from app.core.metrics import family, registry
+from app.core.revocation import revocations
+from app.core.security import hash_pool
+from app.services.llm import llm
+from app.services.search import todo_search
+
+router = APIRouter(tags=["ops"], dependencies=[Depends(require_ops_token)])
+
+
+# ---------------------------------------------------------
+# Scrape-time collectors (read the counters components already keep)
+# ---------------------------------------------------------
+def _pool_families():
+    stats = pool_stats()
+    gauges = ("size", "checked_out", "checked_in", "overflow")
+    counters = ("checkouts", "connects", "invalidations", "timeouts")
+
+    out = []
+    for key in gauges:
+        out.append(family(
+            f"db_pool_{key}", "gauge", f"Connection pool {key.replace('_', ' ')}.",
+            [({"engine": name}, s[key]) for name, s in stats.items() if key in s],
+        ))
+    for key in counters:
+        out.append(family(
+            f"db_pool_{key}_total", "counter", f"Connection pool {key}.",
+            [({"engine": name}, s[key]) for name, s in stats.items()],
+        ))
+    out.append(family(
+        "db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection.",
+        [({"engine": name}, s["wait_seconds_total"]) for name, s in stats.items()],
+    ))
+    return out
+
+
+def _llm_families():
+    s = llm.stats()
+    return [
+        family("llm_calls_total", "counter", "Gemini fallback calls started.", [({}, s["calls"])]),
+        family(
+            "llm_failures_total", "counter", "Gemini fallback calls that did not return a reply.",
+            [({"reason": r}, s[k]) for r, k in (("timeout", "timeouts"), ("error", "errors"), ("breaker_open", "rejected"))],
+        ),
+        family("llm_in_flight", "gauge", "Gemini calls in progress.", [({}, s["in_flight"])]),
+        family(
+            "llm_breaker_open", "gauge", "1 while the LLM circuit breaker is not closed.",
+            [({}, 0 if s["breaker"]["state"] == "closed" else 1)],
+        ),
+    ]
+
+
+def _cache_families():
+    caches = {
+        "principal": principal_cache.stats(),
+        "intent": intent_cache.stats(),
+        "search_index": todo_search.stats(),
+    }
+    rev = revocations.stats()
+    return [
+        family("cache_hits_total", "counter", "Cache hits.", [({"cache": n}, s["hits"]) for n, s in caches.items()]),
+        family("cache_misses_total", "counter", "Cache misses.", [({"cache": n}, s["misses"]) for n, s in caches.items()]),
+        family("cache_entries", "gauge", "Entries held.", [({"cache": n}, s["size"]) for n, s in caches.items()]),
+        family("revocation_checks_total", "counter", "Tokens checked against the revoked set.", [({}, rev["checks"])]),
+        family("revocation_hits_total", "counter", "Checked tokens found revoked.", [({}, rev["hits"])]),
+        family("revoked_tokens", "gauge", "Entries in the in-memory revoked set.", [({}, rev["size"])]),
+    ]
+
+
+def _hash_pool_families():
+    s = hash_pool.stats()
+    return [
+        family("password_hash_pending", "gauge", "Argon2 calls running or queued.", [({}, s["pending"])]),
+        family("password_hash_rejected_total", "counter", "Argon2 calls refused with 429.", [({}, s["rejected"])]),
+    ]
+
+
+registry.add_collector(_pool_families)
+registry.add_collector(_hash_pool_families)
+registry.add_collector(_llm_families)
+registry.add_collector(_cache_families)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
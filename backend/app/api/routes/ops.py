@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+
+from app.api.deps import principal_cache, require_ops_token
+from app.api.routes.chat import intent_cache
+from app.core.database import pool_stats
+from app.core.revocation import revocations
+from app.core.security import hash_pool
+from app.services.llm import llm
+from app.services.search import todo_search
+
+router = APIRouter(prefix="/ops", tags=["ops"], dependencies=[Depends(require_ops_token)])
+
+
+@router.get("/cache")
+def cache_stats():
+    return {
+        "principal": principal_cache.stats(),
+        "revocations": revocations.stats(),
+        "intent": intent_cache.stats(),
+        "search": todo_search.stats(),
+    }
+
+
+@router.get("/pool")
+def db_pool_stats():
+    return pool_stats()
+
+
+@router.get("/password-hash")
+def password_hash_stats():
+    return hash_pool.stats()
+
+
+@router.get("/llm")
+def llm_stats():
+    return llm.stats()
@@ -1,46 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+import sqlalchemy as sa
+from sqlmodel import Session, select, delete, insert, update
 from datetime import datetime, timezone
+from typing import Optional
 
-from app.core.database import get_session
+from app.core.database import AnySession, get_session, run_db
 from app.api.deps import get_current_user
+from app.api.export import FORMAT_PATTERN, export_response
 from app.models import Todo, User
-from app.schemas.todo import TodoCreate, TodoUpdate
+from app.services import todo_stats
+from app.services.search import mark_changed, todo_search
+from app.schemas.todo import (
+    TodoCreate,
+    TodoUpdate,
+    TodoBatchIn,
+    TodoBatchOut,
+    TodoBatchResult,
+)
 
 router = APIRouter(prefix="/todos", tags=["todos"])
 
-@router.get("")
-def list_todos(user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    todos = session.exec(select(Todo).where(Todo.user_id == user.id).order_by(Todo.id.desc())).all()
-    return todos
+# Columns clients may ask for with ?fields=; "id" is always returned
+TODO_FIELDS = ("id", "title", "description", "completed", "created_at", "updated_at")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
 
-@router.post("", status_code=201)
-def create_todo(data: TodoCreate, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    todo = Todo(user_id=user.id, title=data.title, description=data.description)
+
+def _get_owned_todo(session: Session, user_id: int, todo_id: int) -> Todo:
+    todo = session.get(Todo, todo_id)
+    if not todo or todo.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    return todo
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    if not fields:
+        return None
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in TODO_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return ["id"] + [f for f in wanted if f != "id"]
+
+
+def _list_todos(
+    session: Session,
+    user_id: int,
+    completed: Optional[bool] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[int] = None,
+    fields: Optional[list[str]] = None,
+):
+    """
+    Keyset page of the user's todos, newest first.
+
+    Returns (items, next_cursor); next_cursor is the id to pass as ?cursor= for
+    the following page, or None when this page is the last one.
+    """
+    if fields:
+        # sqlalchemy's select, not sqlmodel's: a one-column projection (?fields=id)
+        # must still come back as Rows, not bare scalars
+        q = sa.select(*[getattr(Todo, f) for f in fields])
+    else:
+        q = select(Todo)
+    q = q.where(Todo.user_id == user_id)
+    if completed is not None:
+        q = q.where(Todo.completed == completed)
+    if cursor is not None:
+        q = q.where(Todo.id < cursor)
+    # one extra row tells us whether another page exists
+    q = q.order_by(Todo.id.desc()).limit(limit + 1)
+
+    rows = session.exec(q).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    if fields:
+        return [dict(row._mapping) for row in rows], next_cursor
+    return rows, next_cursor
+
+
+def _create_todo(session: Session, user_id: int, data: TodoCreate) -> Todo:
+    todo = Todo(user_id=user_id, title=data.title, description=data.description)
     session.add(todo)
+    mark_changed(session, user_id)
+    todo_stats.adjust(session, user_id, total=1)
     session.commit()
     session.refresh(todo)
     return todo
 
-@router.get("/{todo_id}")
-def get_todo(todo_id: int, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    todo = session.get(Todo, todo_id)
-    if not todo or todo.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Todo not found")
-    return todo
 
-@router.patch("/{todo_id}")
-def update_todo(todo_id: int, data: TodoUpdate, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    todo = session.get(Todo, todo_id)
-    if not todo or todo.user_id != user.id:
-        raise HTTPException(status_code=404, detail="Todo not found")
+def _update_todo(session: Session, user_id: int, todo_id: int, data: TodoUpdate) -> Todo:
+    todo = _get_owned_todo(session, user_id, todo_id)
 
+    if data.completed is not None:
+        # a guarded UPDATE, not a compare with the value loaded above: a double
+        # click's second PATCH must not count the same flip again
+        todo_stats.set_completed(session, user_id, data.completed, Todo.id == todo_id)
     if data.title is not None:
         todo.title = data.title
     if data.description is not None:
         todo.description = data.description
-    if data.completed is not None:
-        todo.completed = data.completed
+    if data.title is not None or data.description is not None:
+        mark_changed(session, user_id)
 
     todo.updated_at = datetime.now(timezone.utc)
     session.add(todo)
@@ -48,11 +112,177 @@ def update_todo(todo_id: int, data: TodoUpdate, user: User = Depends(get_current
     session.refresh(todo)
     return todo
 
-@router.delete("/{todo_id}", status_code=204)
-def delete_todo(todo_id: int, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    todo = session.get(Todo, todo_id)
-    if not todo or todo.user_id != user.id:
+
+def _delete_todo(session: Session, user_id: int, todo_id: int) -> None:
+    # RETURNING reports the status the row had when it was deleted, and a
+    # concurrent delete of the same todo finds nothing (404) instead of counting twice
+    completed = session.exec(
+        delete(Todo).where(Todo.id == todo_id, Todo.user_id == user_id).returning(Todo.completed)
+    ).first()
+    if completed is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    session.delete(todo)
+    mark_changed(session, user_id)
+    todo_stats.adjust(session, user_id, total=-1, completed=-1 if completed[0] else 0)
     session.commit()
+
+
+def _apply_batch(session: Session, user_id: int, data: TodoBatchIn) -> TodoBatchOut:
+    """
+    Apply a batch in one transaction with set-based statements.
+
+    Patches run first (one ownership SELECT + one bulk UPDATE, plus one guarded
+    UPDATE per target status), then deletes
+    (one DELETE ... RETURNING), then creates (one multi-row INSERT ... RETURNING).
+    Each step that changes counts adds one upsert of the user's todostats row.
+    """
+    results: list[TodoBatchResult] = []
+    patches = [(i, op) for i, op in enumerate(data.ops) if op.op == "patch"]
+    deletes = [(i, op) for i, op in enumerate(data.ops) if op.op == "delete"]
+    creates = [(i, op) for i, op in enumerate(data.ops) if op.op == "create"]
+    if data.ops:
+        mark_changed(session, user_id)
+
+    def not_found(i: int, op) -> TodoBatchResult:
+        return TodoBatchResult(index=i, op=op.op, status=404, id=op.id, detail="Todo not found")
+
+    if patches:
+        owned = set(
+            session.exec(
+                select(Todo.id)
+                .where(Todo.user_id == user_id)
+                .where(Todo.id.in_({op.id for _, op in patches}))
+            ).all()
+        )
+        now = datetime.now(timezone.utc)
+        rows = []
+        status: dict[int, bool] = {}  # id -> final completed (a later patch wins)
+        for i, op in patches:
+            if op.id not in owned:
+                results.append(not_found(i, op))
+                continue
+            values = op.model_dump(exclude={"op"}, exclude_none=True)
+            if "completed" in values:
+                status[op.id] = values.pop("completed")
+            values["updated_at"] = now
+            rows.append(values)
+            results.append(TodoBatchResult(index=i, op=op.op, status=200, id=op.id))
+        if rows:
+            # ORM bulk UPDATE by primary key (executemany)
+            session.exec(update(Todo), params=rows)
+        # status goes through guarded UPDATEs so the stats delta is what actually changed
+        for value in (True, False):
+            ids = [todo_id for todo_id, v in status.items() if v is value]
+            if ids:
+                todo_stats.set_completed(session, user_id, value, Todo.id.in_(ids))
+
+    if deletes:
+        gone = session.exec(
+            delete(Todo)
+            .where(Todo.user_id == user_id)
+            .where(Todo.id.in_({op.id for _, op in deletes}))
+            .returning(Todo.id, Todo.completed)
+        ).all()
+        todo_stats.adjust(session, user_id, total=-len(gone), completed=-sum(1 for _, done in gone if done))
+        deleted = {todo_id for todo_id, _ in gone}
+        for i, op in deletes:
+            if op.id in deleted:
+                deleted.discard(op.id)  # a repeated id only succeeds once
+                results.append(TodoBatchResult(index=i, op=op.op, status=204, id=op.id))
+            else:
+                results.append(not_found(i, op))
+
+    if creates:
+        now = datetime.now(timezone.utc)
+        inserted = session.exec(
+            insert(Todo)
+            .values([
+                {
+                    "user_id": user_id,
+                    "title": op.title,
+                    "description": op.description,
+                    "completed": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for _, op in creates
+            ])
+            .returning(Todo.id, Todo.title, Todo.description)
+        ).all()
+        # RETURNING order isn't guaranteed; identical rows are interchangeable anyway
+        ids_by_content: dict[tuple, list[int]] = {}
+        for row_id, title, description in sorted(inserted):
+            ids_by_content.setdefault((title, description), []).append(row_id)
+        for i, op in creates:
+            new_id = ids_by_content[(op.title, op.description)].pop(0)
+            results.append(TodoBatchResult(index=i, op=op.op, status=201, id=new_id))
+        todo_stats.adjust(session, user_id, total=len(inserted))
+
+    session.commit()
+    results.sort(key=lambda r: r.index)
+    return TodoBatchOut(results=results)
+
+
+@router.get("")
+async def list_todos(
+    response: Response,
+    completed: Optional[bool] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(default=None, ge=1),
+    fields: Optional[str] = None,
+    user: User = Depends(get_current_user),
+    session: AnySession = Depends(get_session),
+):
+    # Always one page (DEFAULT_PAGE_SIZE unless ?limit says otherwise); when
+    # there is more, the next page's cursor comes back in X-Next-Cursor.
+    # GET /todos/export is the way to get everything in one response.
+    items, next_cursor = await run_db(
+        session, _list_todos, user.id, completed, limit, cursor, _parse_fields(fields)
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return items
+
+def _search_todos(session: Session, user_id: int, q: str, limit: int):
+    return todo_search.search(session, user_id, q, limit=limit)
+
+
+@router.get("/search")
+async def search_todos(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    user: User = Depends(get_current_user),
+    session: AnySession = Depends(get_session),
+):
+    # Title or description contains `q` (case-insensitive), best matches first.
+    # Registered before /{todo_id} so "search" isn't taken for an id.
+    return await run_db(session, _search_todos, user.id, q, limit)
+
+@router.get("/export")
+async def export_todos(
+    fmt: str = Query(default="ndjson", alias="format", pattern=FORMAT_PATTERN),
+    user: User = Depends(get_current_user),
+):
+    # Every todo, oldest first, streamed; registered before /{todo_id} too.
+    stmt = select(*[getattr(Todo, f) for f in TODO_FIELDS]).where(Todo.user_id == user.id).order_by(Todo.id.asc())
+    return export_response(stmt, TODO_FIELDS, lambda row: dict(row._mapping), fmt, "todos")
+
+@router.post("", status_code=201)
+async def create_todo(data: TodoCreate, user: User = Depends(get_current_user), session: AnySession = Depends(get_session)):
+    return await run_db(session, _create_todo, user.id, data)
+
+@router.post("/batch", response_model=TodoBatchOut)
+async def batch_todos(data: TodoBatchIn, user: User = Depends(get_current_user), session: AnySession = Depends(get_session)):
+    return await run_db(session, _apply_batch, user.id, data)
+
+@router.get("/{todo_id}")
+async def get_todo(todo_id: int, user: User = Depends(get_current_user), session: AnySession = Depends(get_session)):
+    return await run_db(session, _get_owned_todo, user.id, todo_id)
+
+@router.patch("/{todo_id}")
+async def update_todo(todo_id: int, data: TodoUpdate, user: User = Depends(get_current_user), session: AnySession = Depends(get_session)):
+    return await run_db(session, _update_todo, user.id, todo_id, data)
+
+@router.delete("/{todo_id}", status_code=204)
+async def delete_todo(todo_id: int, user: User = Depends(get_current_user), session: AnySession = Depends(get_session)):
+    await run_db(session, _delete_todo, user.id, todo_id)
     return None
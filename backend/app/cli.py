@@ -0,0 +1,244 @@
+"""
+Maintenance commands.
+
+    cd backend && python -m app.cli <command> [options]
+
+    calibrate-argon2   pick Argon2 costs that hit a target verify time on this host
+    migrate            apply pending schema migrations (--status to list them)
+    check-indexes      EXPLAIN the hot queries and fail if one misses its index
+    repair-stats       recount per-user todo counters and fix any that drifted
+"""
+import argparse
+import json
+from pathlib import Path
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from passlib.hash import argon2
+from sqlalchemy import text
+
+from app.core.config import settings
+
+ENV_FILE = Path(__file__).resolve().parents[1] / ".env"
+
+
+# ---------------------------------------------------------
+# calibrate-argon2
+# ---------------------------------------------------------
+def _verify_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    handler = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    stored = handler.hash("calibration")
+    runs = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.verify("calibration", stored)
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs)
+
+
+def calibrate(target_ms: float, memory_mib: int, parallelism: int, samples: int) -> Tuple[int, int, float]:
+    """
+    Largest time_cost whose verify stays within `target_ms` at this memory
+    cost. If even t=1 is too slow, halve the memory until it fits (not
+    below 19 MiB, the OWASP minimum for argon2id).
+    """
+    memory_cost = memory_mib * 1024
+    while True:
+        best = None
+        t = 1
+        while t <= 20:
+            ms = _verify_ms(t, memory_cost, parallelism, samples)
+            print(f"  t={t:<3} m={memory_cost // 1024:>4} MiB p={parallelism}: {ms:7.1f} ms")
+            if ms > target_ms:
+                break
+            best = (t, memory_cost, ms)
+            t += 1
+        if best is not None:
+            return best
+        if memory_cost // 2 < 19 * 1024:
+            return 1, memory_cost, ms
+        memory_cost //= 2
+
+
+def write_env(path: Path, values: Dict[str, str]) -> None:
+    """Set KEY=value lines in an env file, keeping everything else."""
+    lines = path.read_text().splitlines() if path.exists() else []
+    pending = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in pending:
+            lines[i] = f"{key}={pending.pop(key)}"
+    lines.extend(f"{k}={v}" for k, v in pending.items())
+    path.write_text("\n".join(lines) + "\n")
+
+
+def cmd_calibrate_argon2(args: argparse.Namespace) -> None:
+    print(f"calibrating for a {args.target_ms:g} ms verify")
+    t, m, ms = calibrate(args.target_ms, args.memory_mib, args.parallelism, args.samples)
+    values = {
+        "ARGON2_TIME_COST": str(t),
+        "ARGON2_MEMORY_COST": str(m),
+        "ARGON2_PARALLELISM": str(args.parallelism),
+    }
+    print(f"\nchosen: t={t} m={m // 1024} MiB p={args.parallelism} -> {ms:.1f} ms per verify")
+    for k, v in values.items():
+        print(f"{k}={v}")
+
+    if args.write:
+        write_env(Path(args.env_file), values)
+        print(f"\nwrote {args.env_file}; existing hashes are upgraded as users log in")
+
+
+# ---------------------------------------------------------
+# migrate
+# ---------------------------------------------------------
+def cmd_migrate(args: argparse.Namespace) -> None:
+    from app.core.database import engine
+    from app.migrations import applied_versions, load, migrate
+
+    if args.status:
+        done = set(applied_versions(engine))
+        for migration in load():
+            mark = "applied" if migration.ID in done else "pending"
+            print(f"{mark:<8} {migration.ID}  {migration.DESCRIPTION}")
+        return
+
+    ran = migrate(engine)
+    print("\n".join(f"applied {m}" for m in ran) or "nothing to apply")
+
+
+# ---------------------------------------------------------
+# check-indexes
+# ---------------------------------------------------------
+def hot_queries(dialect: str) -> List[Tuple[str, object, str]]:
+    """(description, statement, index it must use), shaped like the routes' queries."""
+    from sqlmodel import select
+
+    from app.models import ChatMessage, RevokedToken, Todo, User
+
+    extra = []
+    if dialect == "postgresql":
+        # other databases search with the in-process index (app/services/search.py).
+        # No user filter here: that would let the planner pick (user_id, id) instead,
+        # and the point is that ILIKE can use the trigram index at all.
+        extra.append((
+            "todo search",
+            select(Todo).where(Todo.title.ilike("%groceries%")),
+            "ix_todo_title_trgm",
+        ))
+    return extra + [
+        (
+            "todo list page",
+            select(Todo).where(Todo.user_id == 1, Todo.id < 100).order_by(Todo.id.desc()).limit(50),
+            "ix_todo_user_id_id",
+        ),
+        (
+            "todo list page, by status",
+            select(Todo)
+            .where(Todo.user_id == 1, Todo.completed == False, Todo.id < 100)  # noqa: E712
+            .order_by(Todo.id.desc())
+            .limit(50),
+            "ix_todo_user_id_completed_id",
+        ),
+        ("todo numbering", select(Todo.id).where(Todo.user_id == 1).order_by(Todo.id.asc()), "ix_todo_user_id_id"),
+        (
+            "chat history page",
+            select(ChatMessage.id, ChatMessage.role, ChatMessage.content)
+            .where(ChatMessage.user_id == 1, ChatMessage.id < 100)
+            .order_by(ChatMessage.id.desc())
+            .limit(50),
+            "ix_chatmessage_user_id_id",
+        ),
+        ("login", select(User).where(User.email == "a@example.invalid"), "ix_users_email"),
+        ("revocation check", select(RevokedToken).where(RevokedToken.jti == "x"), "ix_revokedtoken_jti"),
+    ]
+
+
+def _plan(conn, sql: str) -> str:
+    if conn.dialect.name == "postgresql":
+        # empty tables make a seq scan cheapest; ask whether an index *can* serve the query
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        return json.dumps(conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar())
+    return "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def _uses_index(conn, plan: str, index: str) -> bool:
+    if conn.dialect.name == "postgresql":
+        return f'"Index Name": "{index}"' in plan
+    return f"INDEX {index} " in plan + " "
+
+
+def cmd_check_indexes(args: argparse.Namespace) -> None:
+    from app.core.database import engine, init_db
+
+    init_db()
+    failed = 0
+    with engine.begin() as conn:
+        for description, stmt, index in hot_queries(engine.dialect.name):
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            plan = _plan(conn, sql)
+            ok = _uses_index(conn, plan, index)
+            failed += not ok
+            print(f"{'ok  ' if ok else 'MISS'} {description:<28} {index}")
+            if not ok or args.verbose:
+                print("     " + plan.replace("\n", "\n     "))
+    if failed:
+        sys.exit(1)
+
+
+# ---------------------------------------------------------
+# repair-stats
+# ---------------------------------------------------------
+def cmd_repair_stats(args: argparse.Namespace) -> None:
+    from sqlmodel import Session
+
+    from app.core.database import engine, init_db
+    from app.services.todo_stats import repair
+
+    init_db()
+    with Session(engine) as session:
+        fixes = repair(session, dry_run=args.dry_run)
+        for user_id, (total, completed), (want_total, want_completed) in fixes:
+            print(f"user {user_id}: total {total} -> {want_total}, completed {completed} -> {want_completed}")
+        if not args.dry_run:
+            session.commit()
+    verb = "would fix" if args.dry_run else "fixed"
+    print(f"{verb} {len(fixes)} user(s)" if fixes else "all counters match")
+
+
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.cli", description="Maintenance commands.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("calibrate-argon2", help="pick Argon2 costs for a target verify time")
+    p.add_argument("--target-ms", type=float, default=250)
+    p.add_argument("--memory-mib", type=int, default=settings.argon2_memory_cost // 1024)
+    p.add_argument("--parallelism", type=int, default=settings.argon2_parallelism)
+    p.add_argument("--samples", type=int, default=3)
+    p.add_argument("--write", action="store_true", help="save the result to the env file")
+    p.add_argument("--env-file", default=str(ENV_FILE))
+    p.set_defaults(func=cmd_calibrate_argon2)
+
+    p = sub.add_parser("migrate", help="apply pending schema migrations")
+    p.add_argument("--status", action="store_true", help="list migrations without applying any")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("check-indexes", help="fail if a hot query doesn't use its index")
+    p.add_argument("--verbose", action="store_true", help="print every plan, not just misses")
+    p.set_defaults(func=cmd_check_indexes)
+
+    p = sub.add_parser("repair-stats", help="recount per-user todo counters")
+    p.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+    p.set_defaults(func=cmd_repair_stats)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
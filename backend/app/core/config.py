@@ -6,10 +6,90 @@ load_dotenv()
 
 class Settings(BaseModel):
     database_url: str = os.getenv("DATABASE_URL", "")
+    # Use AsyncEngine/AsyncSession (psycopg3 async driver) for request handling
+    db_async: bool = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+    # Connection pool. With DB_EXTERNAL_POOLER (PgBouncer / Neon "-pooler" host) the
+    # app keeps no pool of its own and disables prepared statements.
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # true: ping on every checkout; false: rely on recycle + invalidation on disconnect
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    db_external_pooler: bool = os.getenv("DB_EXTERNAL_POOLER", "false").lower() in ("1", "true", "yes")
+
+    # Argon2 cost (defaults are passlib/argon2-cffi's: t=3, m=64 MiB, p=4)
+    argon2_time_cost: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    argon2_memory_cost: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+    argon2_parallelism: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
+    # Hashing runs on its own bounded thread pool (argon2 releases the GIL);
+    # beyond workers + queue, signup/login answer 429 with Retry-After.
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    password_hash_max_queue: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
     jwt_secret: str = os.getenv("JWT_SECRET", "change-me")
+    # Key rotation: JWT_KEYS="kid:secret,..." and the kid new tokens are signed
+    # with (empty = JWT_SECRET, no kid header). Backend: "hmac" (stdlib) or "jose".
+    jwt_keys: str = os.getenv("JWT_KEYS", "")
+    jwt_active_kid: str = os.getenv("JWT_ACTIVE_KID", "")
+    jwt_backend: str = os.getenv("JWT_BACKEND", "hmac")
     jwt_expire_minutes: int = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
 
+    # Authenticated-principal cache (keyed by JWT jti); ttl 0 disables it
+    principal_cache_ttl_seconds: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    principal_cache_max_entries: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+    # Revoked-token set: how long rows are kept and how often workers resync.
+    # Security tradeoff: a logout handled by another worker takes effect here only
+    # at the next sync, so a logged-out token keeps working on this worker for up to
+    # REVOCATION_SYNC_SECONDS. 0 checks the table on every request instead (no lag,
+    # one more query per request). Each sync also re-reads rows revoked in the last
+    # REVOCATION_SYNC_OVERLAP_SECONDS before the previous sync, for logouts that
+    # committed out of id order.
+    revocation_retention_minutes: int = int(
+        os.getenv("REVOCATION_RETENTION_MINUTES", os.getenv("JWT_EXPIRE_MINUTES", "60"))
+    )
+    revocation_sync_seconds: int = int(os.getenv("REVOCATION_SYNC_SECONDS", "2"))
+    revocation_purge_seconds: int = int(os.getenv("REVOCATION_PURGE_SECONDS", "3600"))
+    revocation_sync_overlap_seconds: int = int(os.getenv("REVOCATION_SYNC_OVERLAP_SECONDS", "120"))
+
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     gemini_model: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    # e.g. http://127.0.0.1:8099 for app/services/fake_llm.py (REST transport, no key needed)
+    gemini_endpoint: str = os.getenv("GEMINI_ENDPOINT", "")
+
+    # LLM fallback limits: per-call deadline (including the wait for a slot),
+    # concurrent calls per process, and the circuit breaker that skips the LLM
+    # for LLM_BREAKER_RESET_SECONDS after LLM_BREAKER_FAILURES failures in a row.
+    llm_timeout_seconds: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "8"))
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    llm_breaker_failures: int = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    llm_breaker_reset_seconds: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+    # Cache of LLM intent results keyed by normalized text; ttl 0 disables it.
+    # INTENT_CACHE_PERSIST also keeps entries in the database across restarts.
+    intent_cache_ttl_seconds: int = int(os.getenv("INTENT_CACHE_TTL_SECONDS", "86400"))
+    intent_cache_max_entries: int = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "5000"))
+    intent_cache_persist: bool = os.getenv("INTENT_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+    # Todo search: "trigram" (Postgres pg_trgm), "memory" (in-process index,
+    # for single-process SQLite) or "auto" (by database). The memory backend
+    # keeps an index for up to SEARCH_INDEX_MAX_USERS users; the TTL bounds how
+    # long another process's writes can go unseen.
+    search_backend: str = os.getenv("SEARCH_BACKEND", "auto")
+    search_index_max_users: int = int(os.getenv("SEARCH_INDEX_MAX_USERS", "256"))
+    search_index_ttl_seconds: int = int(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+
+    # /metrics and /ops/* are off (404) unless OPS_TOKEN is set; then they need
+    # "Authorization: Bearer <OPS_TOKEN>" (Prometheus: bearer_token in the scrape config).
+    ops_token: str = os.getenv("OPS_TOKEN", "")
+
+    # Per-request instrumentation: Server-Timing header (db, pool, llm, hash),
+    # a JSON log line per request, and the SQL trace of requests slower than
+    # SLOW_REQUEST_MS (0 disables).
+    server_timing: bool = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+    request_log: bool = os.getenv("REQUEST_LOG", "false").lower() in ("1", "true", "yes")
+    slow_request_ms: int = int(os.getenv("SLOW_REQUEST_MS", "0"))
 
 settings = Settings()
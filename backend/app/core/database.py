@@ -1,13 +1,86 @@
+from typing import Any, Callable, TypeVar, Union
+
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
 from .config import settings
+from .instrumentation import instrument_queries
+from .pool import engine_options, instrument_engine, pool_status
+
+T = TypeVar("T")
+AnySession = Union[Session, AsyncSession]
+
+# Async drivers for the URL schemes we use (psycopg3 serves both sync and async)
+_ASYNC_DRIVERS = {
+    "postgres": "postgresql+psycopg",
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+# The sync engine is always available: startup, background jobs and CLI use it.
+engine = create_engine(
+    settings.database_url, echo=False, **engine_options(settings.database_url, is_async=False)
+)
+engine_metrics = instrument_engine(engine)
+instrument_queries(engine)
+
+async_engine = None
+async_engine_metrics = None
+if settings.db_async:
+    async_url = _async_url(settings.database_url)
+    async_engine = create_async_engine(async_url, echo=False, **engine_options(async_url, is_async=True))
+    async_engine_metrics = instrument_engine(async_engine.sync_engine)
+    instrument_queries(async_engine.sync_engine)
+
+
+def pool_stats() -> dict:
+    out = {"sync": pool_status(engine, engine_metrics)}
+    if async_engine is not None:
+        out["async"] = pool_status(async_engine.sync_engine, async_engine_metrics)
+    return out
 
-engine = create_engine(settings.database_url, echo=False, pool_pre_ping=True)
 
 def init_db() -> None:
     # IMPORTANT: Import models so metadata contains tables
     import app.models  # noqa: F401
+    from app.migrations import migrate
+
     SQLModel.metadata.create_all(engine)
+    migrate(engine)
+
 
-def get_session():
+def get_sync_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    # expire_on_commit=False: objects are read after commit outside the greenlet
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+# Routes depend on get_session; DB_ASYNC picks which one it is.
+get_session = get_async_session if settings.db_async else get_sync_session
+
+
+async def run_db(session: AnySession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run sync session code from an async route.
+
+    In async mode this runs on the event loop via AsyncSession.run_sync (no worker
+    thread is held while waiting on the network); in sync mode it runs in the
+    thread pool as before. `fn` receives a sync Session as its first argument.
+    """
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, session, *args, **kwargs)
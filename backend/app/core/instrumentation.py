@@ -0,0 +1,190 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, LLM_LATENCY, PASSWORD_HASH_LATENCY
+
+log = logging.getLogger("app.requests")
+
+
+class RequestTimings:
+    """Where one request spent its time. Times are in seconds."""
+
+    __slots__ = ("queries", "db", "pool_wait", "llm", "llm_calls", "password_hash", "trace")
+
+    def __init__(self, trace: bool = False):
+        self.queries = 0
+        self.db = 0.0
+        self.pool_wait = 0.0
+        self.llm = 0.0
+        self.llm_calls = 0
+        self.password_hash = 0.0
+        # (seconds, statement) per query; only kept when slow requests are logged
+        self.trace: Optional[List[Tuple[float, str]]] = [] if trace else None
+
+    def server_timing(self, total: float) -> str:
+        parts = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f"pool;dur={self.pool_wait * 1000:.1f}",
+        ]
+        if self.llm_calls:
+            parts.append(f"llm;dur={self.llm * 1000:.1f}")
+        if self.password_hash:
+            parts.append(f"hash;dur={self.password_hash * 1000:.1f}")
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db * 1000, 2),
+            "pool_wait_ms": round(self.pool_wait * 1000, 2),
+            "llm_ms": round(self.llm * 1000, 2),
+            "llm_calls": self.llm_calls,
+            "hash_ms": round(self.password_hash * 1000, 2),
+        }
+
+
+# Set per request by InstrumentationMiddleware. Thread-pool and run_sync work
+# inherit the context, so they update the same object.
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record_pool_wait(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.pool_wait += seconds
+
+
+_LATENCY = {"llm": LLM_LATENCY, "password_hash": PASSWORD_HASH_LATENCY}
+
+
+@contextmanager
+def timed(kind: str, *labels: str):
+    """Time the block into the `kind` ("llm" or "password_hash") histogram and the request's timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _LATENCY[kind].observe(elapsed, *labels)
+        timings = _current.get()
+        if timings is not None and kind == "llm":
+            timings.llm += elapsed
+            timings.llm_calls += 1
+        elif timings is not None:
+            timings.password_hash += elapsed
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Count statements and their time against the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _current.get()
+        starts = conn.info.get("query_start")
+        if timings is None or not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        timings.queries += 1
+        timings.db += elapsed
+        if timings.trace is not None:
+            timings.trace.append((elapsed, statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware that times each HTTP request.
+
+    Feeds the HTTP metrics, adds a Server-Timing header (db, pool, llm,
+    hash, total), logs one JSON line per request when `log_requests` is on,
+    and logs the statement trace of any request slower than `slow_ms`
+    (0 = never).
+    """
+
+    def __init__(self, app, server_timing: bool = True, log_requests: bool = False, slow_ms: int = 0):
+        self.app = app
+        self.server_timing = server_timing
+        self.log_requests = log_requests
+        self.slow_ms = slow_ms
+        if (log_requests or slow_ms) and not log.handlers and not logging.getLogger().handlers:
+            # uvicorn only configures its own loggers
+            log.addHandler(logging.StreamHandler())
+        if log_requests:
+            log.setLevel(logging.INFO)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(trace=self.slow_ms > 0)
+        token = _current.set(timings)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    value = timings.server_timing(time.perf_counter() - start)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            # the route template, not the raw path, keeps label values bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+            HTTP_LATENCY.observe(elapsed, scope["method"], route)
+
+            elapsed_ms = elapsed * 1000
+            slow = self.slow_ms > 0 and elapsed_ms >= self.slow_ms
+            if slow or self.log_requests:
+                self._log(scope, route, status, elapsed_ms, timings, slow)
+
+    def _log(self, scope, route: str, status: int, elapsed_ms: float, timings: RequestTimings, slow: bool) -> None:
+        record = {
+            "method": scope["method"],
+            "route": route if route != "unmatched" else scope["path"],
+            "status": status,
+            "ms": round(elapsed_ms, 2),
+            **timings.as_dict(),
+        }
+        if slow:
+            record["trace"] = [
+                {"ms": round(seconds * 1000, 2), "sql": " ".join(sql.split())}
+                for seconds, sql in timings.trace or ()
+            ]
+            log.warning("slow request %s", json.dumps(record))
+        else:
+            log.info("request %s", json.dumps(record))
@@ -0,0 +1,138 @@
+from threading import Lock
+import time
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from .config import settings
+from .instrumentation import record_pool_wait
+
+
+class PoolMetrics:
+    """Counters for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_peak = 0
+
+    def record_wait(self, seconds: float, overflow: int) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+            if overflow > self.overflow_peak:
+                self.overflow_peak = overflow
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "overflow_peak": self.overflow_peak,
+            }
+
+
+class _TimedPoolMixin:
+    # set by instrument_engine(); carried over when the pool is recreated
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.incr("timeouts")
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            record_pool_wait(waited)
+            if self.metrics:
+                self.metrics.record_wait(waited, max(self.overflow(), 0))
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool) -> dict[str, Any]:
+    """create_engine()/create_async_engine() keyword arguments from Settings."""
+    opts: dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        return opts
+
+    if settings.db_external_pooler:
+        # PgBouncer (e.g. Neon's -pooler endpoint) owns pooling; transaction-mode
+        # poolers also can't keep server-side prepared statements across clients.
+        opts["poolclass"] = NullPool
+        if url.startswith("postgres"):
+            opts["connect_args"] = {"prepare_threshold": None}
+        return opts
+
+    opts.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    return opts
+
+
+def instrument_engine(engine: Engine) -> PoolMetrics:
+    metrics = PoolMetrics()
+    pool = engine.pool
+    if isinstance(pool, _TimedPoolMixin):
+        pool.metrics = metrics
+
+    event.listen(engine, "checkout", lambda *a: metrics.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *a: metrics.incr("checkins"))
+    event.listen(engine, "connect", lambda *a: metrics.incr("connects"))
+    event.listen(engine, "invalidate", lambda *a: metrics.incr("invalidations"))
+    event.listen(engine, "soft_invalidate", lambda *a: metrics.incr("invalidations"))
+    return metrics
+
+
+def pool_status(engine: Engine, metrics: PoolMetrics) -> dict:
+    pool = engine.pool
+    out: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+        )
+    out.update(metrics.snapshot())
+    return out
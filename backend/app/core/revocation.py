@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+from sqlmodel import Session, select, delete, or_
+
+from app.models import RevokedToken
+
+from .config import settings
+from .database import engine
+
+log = logging.getLogger(__name__)
+
+
+def _retention_cutoff() -> datetime:
+    # A token is never valid longer than its lifetime after being revoked,
+    # so rows older than that can no longer match a live token.
+    return datetime.now(timezone.utc) - timedelta(minutes=settings.revocation_retention_minutes)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # timestamps come back naive from columns without a time zone
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+class RevocationList:
+    """
+    In-memory mirror of the `revokedtoken` table.
+
+    Loaded at startup and updated on logout; a periodic refresh pulls rows
+    written by other workers. Until the first load succeeds, or when periodic
+    sync is off (REVOCATION_SYNC_SECONDS=0), callers should also query the table.
+    """
+
+    def __init__(self):
+        self._jtis: dict[str, datetime] = {}
+        self._last_id = 0
+        self._synced_at: datetime | None = None
+        self._lock = Lock()
+        self.loaded = False
+        self.checks = 0
+        self.hits = 0
+
+    def __contains__(self, jti: str) -> bool:
+        self.checks += 1
+        if jti in self._jtis:
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._jtis)
+
+    @property
+    def authoritative(self) -> bool:
+        """Whether a jti missing from the set can be trusted as not revoked."""
+        return self.loaded and settings.revocation_sync_seconds > 0
+
+    def add(self, jti: str, revoked_at: datetime | None = None) -> None:
+        with self._lock:
+            self._jtis[jti] = revoked_at or datetime.now(timezone.utc)
+
+    def refresh(self) -> int:
+        """
+        Pull rows added since the last refresh. Returns how many were new.
+
+        Ids are assigned at INSERT but become visible at COMMIT, so a lower id
+        can show up after a higher one was synced. Besides `id > last_id`, each
+        sync re-reads everything revoked within the overlap window before the
+        previous sync; already-known jtis are simply skipped.
+        """
+        started = datetime.now(timezone.utc)
+        q = select(RevokedToken.id, RevokedToken.jti, RevokedToken.revoked_at).where(
+            RevokedToken.revoked_at >= _retention_cutoff()
+        )
+        if self._synced_at is not None:
+            window = self._synced_at - timedelta(seconds=settings.revocation_sync_overlap_seconds)
+            q = q.where(or_(RevokedToken.id > self._last_id, RevokedToken.revoked_at >= window))
+        with Session(engine) as session:
+            rows = session.exec(q.order_by(RevokedToken.id.asc())).all()
+
+        new = 0
+        with self._lock:
+            for row_id, jti, revoked_at in rows:
+                if jti not in self._jtis:
+                    new += 1
+                self._jtis[jti] = _as_utc(revoked_at)
+                self._last_id = max(self._last_id, row_id)
+            self._synced_at = started
+        self.loaded = True
+        return new
+
+    def purge_expired(self) -> int:
+        """Delete rows (and entries) whose tokens have expired anyway."""
+        cutoff = _retention_cutoff()
+        with Session(engine) as session:
+            result = session.exec(delete(RevokedToken).where(RevokedToken.revoked_at < cutoff))
+            session.commit()
+
+        with self._lock:
+            for jti, revoked_at in list(self._jtis.items()):
+                if revoked_at < cutoff:
+                    del self._jtis[jti]
+        return result.rowcount or 0
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "size": len(self._jtis),
+            "last_id": self._last_id,
+            "checks": self.checks,
+            "hits": self.hits,
+        }
+
+
+revocations = RevocationList()
+
+
+async def revocation_maintenance() -> None:
+    """Background job: sync new revocations from other workers and purge expired rows."""
+    sync = settings.revocation_sync_seconds > 0
+    interval = settings.revocation_sync_seconds if sync else settings.revocation_purge_seconds
+    since_purge = float(settings.revocation_purge_seconds)
+    while True:
+        await asyncio.sleep(interval)
+        since_purge += interval
+        try:
+            if since_purge >= settings.revocation_purge_seconds:
+                purged = await asyncio.to_thread(revocations.purge_expired)
+                since_purge = 0.0
+                if purged:
+                    log.info("purged %d expired revoked tokens", purged)
+            if sync:
+                await asyncio.to_thread(revocations.refresh)
+        except Exception:
+            log.exception("revocation maintenance failed")
@@ -1,38 +1,113 @@
-from datetime import datetime, timedelta, timezone
-import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import math
+import time
+from typing import Any, Callable, Optional, Tuple, TypeVar
 
-from jose import jwt
 from passlib.context import CryptContext
 
 from .config import settings
+from .instrumentation import timed
+from .tokens import tokens
+
+T = TypeVar("T")
 
 # Use Argon2 instead of bcrypt (more reliable on Python 3.13)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
+)
+
+
+class PasswordHashBusy(RuntimeError):
+    """The hash pool's queue is full; try again after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"password hashing is saturated, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordHashPool:
+    """
+    Bounded executor for Argon2 work.
+
+    argon2-cffi releases the GIL while hashing, so a few dedicated threads
+    use real cores without touching the shared thread pool that sync DB
+    work runs on. At most `workers + max_queue` calls are admitted; the
+    rest fail fast with PasswordHashBusy instead of queueing behind a
+    login storm. Admission is tracked on the event loop only.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_pending = self.workers + max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.avg_seconds = 0.0  # moving average of one call, for Retry-After
 
-ALGORITHM = "HS256"
+    def retry_after(self) -> int:
+        waves = self.pending / self.workers
+        return max(1, math.ceil(waves * (self.avg_seconds or 0.1)))
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashBusy(self.retry_after())
+
+        self.pending += 1
+        ctx = contextvars.copy_context()  # keeps request timings attached
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, ctx.run, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            elapsed = time.perf_counter() - start
+            self.avg_seconds = elapsed if not self.avg_seconds else 0.9 * self.avg_seconds + 0.1 * elapsed
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": round(self.avg_seconds, 4),
+        }
+
+
+hash_pool = PasswordHashPool(settings.password_hash_workers, settings.password_hash_max_queue)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    with timed("password_hash", "hash"):
+        return pwd_context.hash(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    with timed("password_hash", "verify"):
+        return pwd_context.verify(password, hashed)
 
 
-def create_access_token(subject: str, expires_minutes: int) -> str:
-    now = datetime.now(timezone.utc)
-    exp = now + timedelta(minutes=expires_minutes)
-    jti = str(uuid.uuid4())
+def verify_and_update_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify, and if the stored hash uses other Argon2 costs than the current
+    settings, also return a fresh hash to store (else None).
+    """
+    with timed("password_hash", "verify"):
+        return pwd_context.verify_and_update(password, hashed)
 
-    payload = {
-        "sub": subject,
-        "exp": exp,
-        "iat": now,
-        "jti": jti,
-    }
-    return jwt.encode(payload, settings.jwt_secret, algorithm=ALGORITHM)
+
+def create_access_token(subject: str, expires_minutes: int) -> str:
+    return tokens.issue(subject, expires_minutes)
 
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
\ No newline at end of file
+    # raises TokenError for bad signatures, unknown kids and expired tokens
+    return tokens.verify(token)
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Access tokens: HS256 JWTs signed with a rotating key ring.
+
+Keys are identified by the `kid` header. New tokens are signed with the
+active key; any key still in the ring verifies. Tokens without a `kid`
+(issued before key rotation existed) are checked against JWT_SECRET.
+
+Two interchangeable backends produce and accept the same tokens:
+
+- "hmac": stdlib hmac/json with per-key HMAC state and encoded headers
+  prepared once. This is the default, since it runs on every request.
+- "jose": python-jose, the previous implementation.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import Dict, Optional
+
+from jose import jwt as jose_jwt
+
+from .config import settings
+
+ALGORITHM = "HS256"
+LEGACY_KID = ""  # tokens without a kid header
+
+
+class TokenError(Exception):
+    """Malformed, wrongly signed, or expired token."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class KeyRing:
+    def __init__(self, keys: Dict[str, str], active_kid: str):
+        if active_kid not in keys:
+            raise ValueError(f"JWT_ACTIVE_KID {active_kid!r} is not among the configured keys")
+        self.secrets = dict(keys)
+        self.active_kid = active_kid
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        # JWT_KEYS="2025-01:secret-a,2025-06:secret-b"; JWT_SECRET stays valid for kid-less tokens
+        keys = {LEGACY_KID: settings.jwt_secret}
+        for item in settings.jwt_keys.split(","):
+            kid, sep, secret = item.strip().partition(":")
+            if sep and kid and secret:
+                keys[kid] = secret
+        return cls(keys, settings.jwt_active_kid)
+
+
+class HmacBackend:
+    name = "hmac"
+
+    def __init__(self, ring: KeyRing):
+        self.ring = ring
+        self._macs = {kid: hmac.new(s.encode("utf-8"), digestmod=hashlib.sha256) for kid, s in ring.secrets.items()}
+        self._headers = {}  # kid -> encoded header segment
+        self._kids = {}  # encoded header segment -> kid, for headers we issued
+        for kid in ring.secrets:
+            header = {"alg": ALGORITHM, "typ": "JWT"}
+            if kid != LEGACY_KID:
+                header["kid"] = kid
+            # sorted like python-jose, so its tokens take the fast path too
+            segment = _b64encode(json.dumps(header, separators=(",", ":"), sort_keys=True).encode())
+            self._headers[kid] = segment
+            self._kids[segment] = kid
+
+    def _sign(self, kid: str, signing_input: bytes) -> bytes:
+        mac = self._macs[kid].copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def encode(self, payload: dict) -> str:
+        kid = self.ring.active_kid
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        signing_input = f"{self._headers[kid]}.{body}"
+        return f"{signing_input}.{_b64encode(self._sign(kid, signing_input.encode('ascii')))}"
+
+    def _kid(self, header_segment: str) -> str:
+        kid = self._kids.get(header_segment)
+        if kid is not None:
+            return kid
+        # a header we didn't produce (other spacing, extra fields)
+        header = json.loads(_b64decode(header_segment))
+        if not isinstance(header, dict):
+            raise TokenError("malformed token")
+        if header.get("alg") != ALGORITHM:
+            raise TokenError("unsupported alg")
+        kid = header.get("kid", LEGACY_KID)
+        if not isinstance(kid, str):
+            raise TokenError("unknown kid")
+        return kid
+
+    def decode(self, token: str) -> dict:
+        try:
+            header_segment, body, signature = token.split(".")
+            kid = self._kid(header_segment)
+            if kid not in self._macs:
+                raise TokenError("unknown kid")
+            expected = self._sign(kid, f"{header_segment}.{body}".encode("ascii"))
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise TokenError("bad signature")
+            payload = json.loads(_b64decode(body))
+            if not isinstance(payload, dict):
+                raise TokenError("malformed token")
+        except TokenError:
+            raise
+        except (ValueError, binascii.Error, UnicodeError) as e:
+            raise TokenError("malformed token") from e
+
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or exp < time.time():
+            raise TokenError("expired")
+        return payload
+
+
+class JoseBackend:
+    name = "jose"
+
+    def __init__(self, ring: KeyRing):
+        self.ring = ring
+
+    def encode(self, payload: dict) -> str:
+        kid = self.ring.active_kid
+        headers = {"kid": kid} if kid != LEGACY_KID else None
+        return jose_jwt.encode(payload, self.ring.secrets[kid], algorithm=ALGORITHM, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        try:
+            kid = jose_jwt.get_unverified_header(token).get("kid", LEGACY_KID)
+            secret = self.ring.secrets.get(kid)
+            if secret is None:
+                raise TokenError("unknown kid")
+            return jose_jwt.decode(token, secret, algorithms=[ALGORITHM])
+        except TokenError:
+            raise
+        except Exception as e:
+            raise TokenError(str(e)) from e
+
+
+BACKENDS = {"hmac": HmacBackend, "jose": JoseBackend}
+
+
+class TokenService:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def issue(self, subject: str, expires_minutes: int, now: Optional[int] = None) -> str:
+        now = int(time.time()) if now is None else now
+        return self.backend.encode(
+            {"sub": subject, "exp": now + expires_minutes * 60, "iat": now, "jti": secrets.token_hex(16)}
+        )
+
+    def verify(self, token: str) -> dict:
+        return self.backend.decode(token)
+
+
+def build_token_service(backend: Optional[str] = None) -> TokenService:
+    name = backend or settings.jwt_backend
+    if name not in BACKENDS:
+        raise ValueError(f"JWT_BACKEND must be one of {', '.join(BACKENDS)}, not {name!r}")
+    return TokenService(BACKENDS[name](KeyRing.from_settings()))
+
+
+tokens = build_token_service()
@@ -0,0 +1,105 @@
+"""
+Schema migrations.
+
+create_all() only creates missing tables; changes to existing ones (new
+indexes, columns, backfills) are migrations. Each is a module in this
+package with ID, DESCRIPTION, TRANSACTIONAL and up(conn), listed in
+MIGRATIONS in the order they apply. Applied ids are recorded in the
+schema_migrations table; init_db() runs whatever is pending at startup,
+and `python -m app.cli migrate --status` shows where a database stands.
+
+Migrations must be safe on a fresh database too (where create_all already
+built the current schema), hence IF [NOT] EXISTS everywhere.
+"""
+from datetime import datetime, timezone
+from importlib import import_module
+import logging
+import time
+from types import ModuleType
+from typing import List
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    "m0001_composite_indexes",
+    "m0002_todo_trigram_indexes",
+    "m0003_todo_stats_backfill",
+]
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String(64), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+# any constant works; it only has to be the same in every worker
+_PG_LOCK_ID = 7_210_314
+_LOCK_POLL_SECONDS = 1.0
+
+
+def load() -> List[ModuleType]:
+    return [import_module(f"{__name__}.{name}") for name in MIGRATIONS]
+
+
+def applied_versions(engine: Engine) -> List[str]:
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        return list(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _apply(engine: Engine, migration: ModuleType) -> None:
+    record = schema_migrations.insert().values(version=migration.ID, applied_at=datetime.now(timezone.utc))
+    if migration.TRANSACTIONAL:
+        with engine.begin() as conn:
+            migration.up(conn)
+            conn.execute(record)
+        return
+    # e.g. CREATE INDEX CONCURRENTLY, which Postgres refuses inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration.up(conn)
+        conn.execute(record)
+
+
+def _wait_for_lock(lock_conn) -> None:
+    """
+    Take the migration lock, polling rather than blocking.
+
+    A worker parked in pg_advisory_lock() holds a snapshot, and CREATE INDEX
+    CONCURRENTLY in the lock holder waits for every older snapshot to end:
+    a deadlock Postgres can't see. Between polls this worker runs nothing.
+    """
+    waited = False
+    while not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": _PG_LOCK_ID}).scalar():
+        if not waited:
+            log.info("another process is migrating; waiting")
+            waited = True
+        time.sleep(_LOCK_POLL_SECONDS)
+
+
+def migrate(engine: Engine) -> List[str]:
+    """Apply pending migrations in order. Returns the ids applied."""
+    _metadata.create_all(engine)
+    is_pg = engine.dialect.name == "postgresql"
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if is_pg:
+            # workers starting together: one migrates, the others wait and find nothing to do
+            _wait_for_lock(lock_conn)
+        try:
+            done = set(applied_versions(engine))
+            ran = []
+            for migration in load():
+                if migration.ID in done:
+                    continue
+                log.info("applying migration %s: %s", migration.ID, migration.DESCRIPTION)
+                _apply(engine, migration)
+                ran.append(migration.ID)
+            return ran
+        finally:
+            if is_pg:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _PG_LOCK_ID})
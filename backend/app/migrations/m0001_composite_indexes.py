@@ -0,0 +1,27 @@
+"""
+Composite indexes for the hot query shapes.
+
+Every todo/chat read filters by user_id and orders by id (keyset pages,
+local numbering), and filtered lists add completed. (user_id, id) also
+serves plain user_id lookups, so the single-column indexes go.
+"""
+from sqlalchemy import text
+
+ID = "0001_composite_indexes"
+DESCRIPTION = "(user_id, id) on todo and chatmessage, (user_id, completed, id) on todo"
+TRANSACTIONAL = False  # Postgres builds the indexes CONCURRENTLY
+
+CREATE = [
+    ("ix_todo_user_id_id", "todo (user_id, id)"),
+    ("ix_todo_user_id_completed_id", "todo (user_id, completed, id)"),
+    ("ix_chatmessage_user_id_id", "chatmessage (user_id, id)"),
+]
+DROP = ["ix_todo_user_id", "ix_chatmessage_user_id"]
+
+
+def up(conn) -> None:
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    for name, target in CREATE:
+        conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {target}"))
+    for name in DROP:
+        conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {name}"))
@@ -0,0 +1,23 @@
+"""
+Trigram GIN indexes for todo search (Postgres only).
+
+pg_trgm lets ILIKE '%q%' use an index instead of reading every row the
+user has; see app/services/search.py. Other databases search with the
+in-process index, so this is a no-op for them.
+"""
+from sqlalchemy import text
+
+ID = "0002_todo_trigram_indexes"
+DESCRIPTION = "pg_trgm GIN indexes on todo title and description"
+TRANSACTIONAL = False  # CREATE INDEX CONCURRENTLY
+
+
+def up(conn) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in ("title", "description"):
+        conn.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_todo_{column}_trgm "
+            f"ON todo USING gin ({column} gin_trgm_ops)"
+        ))
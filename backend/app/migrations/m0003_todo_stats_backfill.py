@@ -0,0 +1,24 @@
+"""
+Fill todostats from the todo table.
+
+create_all() adds the empty table; from then on the write paths keep it
+current, so this runs once. Drift found later is fixed with
+`python -m app.cli repair-stats`.
+"""
+from sqlalchemy import text
+
+ID = "0003_todo_stats_backfill"
+DESCRIPTION = "backfill per-user todo counters"
+TRANSACTIONAL = True
+
+# "WHERE true" keeps SQLite from reading ON CONFLICT as part of the SELECT
+BACKFILL = """
+INSERT INTO todostats (user_id, total, completed)
+SELECT user_id, count(*), sum(CASE WHEN completed THEN 1 ELSE 0 END)
+FROM todo WHERE true GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET total = excluded.total, completed = excluded.completed
+"""
+
+
+def up(conn) -> None:
+    conn.execute(text(BACKFILL))
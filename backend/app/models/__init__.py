@@ -2,3 +2,5 @@ from .user import User
 from .todo import Todo
 from .chat import ChatMessage
 from .revoked_token import RevokedToken
+from .intent_cache import IntentCacheEntry
+from .todo_stats import TodoStats
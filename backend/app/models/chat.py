@@ -1,10 +1,14 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime, timezone
 
 class ChatMessage(SQLModel, table=True):
+    # History is read as keyset pages per user; see app/migrations/m0001
+    __table_args__ = (Index("ix_chatmessage_user_id_id", "user_id", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(index=True)
+    user_id: int
 
     role: str  # "user" | "assistant"
     content: str
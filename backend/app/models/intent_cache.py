@@ -0,0 +1,8 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime, timezone
+
+class IntentCacheEntry(SQLModel, table=True):
+    # sha256 of namespace + normalized user text
+    key: str = Field(primary_key=True, max_length=64)
+    actions: str  # JSON action template, numbers as {"$n": i} placeholders
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -1,10 +1,17 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime, timezone
 
 class Todo(SQLModel, table=True):
+    # Reads filter by user and order by id; see app/migrations/m0001
+    __table_args__ = (
+        Index("ix_todo_user_id_id", "user_id", "id"),
+        Index("ix_todo_user_id_completed_id", "user_id", "completed", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(index=True)
+    user_id: int
 
     title: str
     description: str | None = None
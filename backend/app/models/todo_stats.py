@@ -0,0 +1,9 @@
+from sqlmodel import SQLModel, Field
+
+
+class TodoStats(SQLModel, table=True):
+    # Per-user counters kept in step with every todo write (app/services/todo_stats.py);
+    # no row means no todos. Pending is total - completed.
+    user_id: int = Field(primary_key=True)
+    total: int = 0
+    completed: int = 0
@@ -4,4 +4,4 @@ class ChatIn(BaseModel):
     message: str = Field(min_length=1, max_length=2000)
 
 class ChatOut(BaseModel):
-    reply: str
+    message: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
 class TodoCreate(BaseModel):
     title: str = Field(min_length=1, max_length=120)
@@ -9,3 +9,35 @@ class TodoUpdate(BaseModel):
     title: Optional[str] = Field(default=None, min_length=1, max_length=120)
     description: Optional[str] = Field(default=None, max_length=500)
     completed: Optional[bool] = None
+
+
+# ---------------------------------------------------------
+# Batch operations (POST /todos/batch)
+# ---------------------------------------------------------
+class TodoBatchCreate(TodoCreate):
+    op: Literal["create"]
+
+class TodoBatchPatch(TodoUpdate):
+    op: Literal["patch"]
+    id: int
+
+class TodoBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+TodoBatchOp = Annotated[
+    Union[TodoBatchCreate, TodoBatchPatch, TodoBatchDelete], Field(discriminator="op")
+]
+
+class TodoBatchIn(BaseModel):
+    ops: List[TodoBatchOp] = Field(min_length=1, max_length=1000)
+
+class TodoBatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class TodoBatchOut(BaseModel):
+    results: List[TodoBatchResult]
@@ -0,0 +1,51 @@
+"""
+Stand-in for the Gemini REST API, for tests and load runs.
+
+    uvicorn app.services.fake_llm:app --port 8099
+    GEMINI_ENDPOINT=http://127.0.0.1:8099 uvicorn main:app
+
+Behaviour is set with environment variables (read per request, so a test
+can change them between calls):
+
+    FAKE_LLM_DELAY_SECONDS   latency added to every reply (default 0)
+    FAKE_LLM_FAILURE_RATE    fraction of calls answered with HTTP 503 (default 0)
+    FAKE_LLM_REPLY           text the model "answers" (default {"action":"unknown"})
+"""
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="fake-llm")
+app.state.calls = 0
+
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def generate_content(model: str, request: Request):
+    await request.body()
+    app.state.calls += 1
+
+    delay = float(os.getenv("FAKE_LLM_DELAY_SECONDS", "0"))
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    if random.random() < float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")):
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"code": 503, "message": "fake upstream failure", "status": "UNAVAILABLE"}},
+        )
+
+    reply = os.getenv("FAKE_LLM_REPLY", '{"action":"unknown"}')
+    return {
+        "candidates": [
+            {"content": {"role": "model", "parts": [{"text": reply}]}, "finishReason": "STOP", "index": 0}
+        ],
+        "modelVersion": model,
+    }
+
+
+@app.get("/stats")
+def stats():
+    return {"calls": app.state.calls}
@@ -0,0 +1,760 @@
+"""
+English intent grammar for chat messages (no LLM involved).
+
+The grammar is a table of rules in priority order. Each rule names a few
+anchor words, an exact gate and a handler that builds the actions:
+
+- all anchors of all rules are compiled into one trie-shaped regex that
+  finds every anchor starting a word; it runs once per distinct
+  (space-separated) word and is remembered, so a message costs one dict
+  lookup per word;
+- only rules with an anchor in the message are candidates, and candidates
+  are tried in table order: the first gate that passes wins;
+- no anchor at all means "unknown" straight away.
+
+An anchor must occur in every message that can pass the rule's gate, at the
+start of a word. Pick it from inside the gate's phrase where possible
+("which todo" -> "todo"): the phrase itself may start mid-word, the words
+after its first space never do.
+
+    Rule("group_by_status", ("group",), lambda m: "group" in m.t and "status" in m.t, _group)
+
+Anchors may not be prefixes of one another (IntentGrammar checks this).
+"""
+from functools import reduce
+from itertools import chain
+from operator import or_
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+Parsed = Tuple[str, Dict[str, Any]]  # (action, payload)
+
+
+# =========================================================
+# Parsing utilities
+# =========================================================
+_INT = re.compile(r"\b(\d+)\b")
+_RANGE = re.compile(r"\b(\d+)\s*(?:to|-)\s*(\d+)\b")
+_NTH = re.compile(r"\b(\d+)(st|nd|rd|th)\b")
+_ORDINALS = {"first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5}
+_ORDINAL_WORD = re.compile(r"\b(first|second|third|fourth|fifth)\b")
+_ADD_N_TODOS = re.compile(r"\badd\s+\d+\s+todos?\b(.+)$", re.I)
+
+
+def human_list(nums: List[int]) -> str:
+    nums = sorted(set(nums))
+    if not nums:
+        return ""
+    if len(nums) == 1:
+        return str(nums[0])
+    if len(nums) == 2:
+        return f"{nums[0]} and {nums[1]}"
+    return ", ".join(map(str, nums[:-1])) + f", and {nums[-1]}"
+
+
+def extract_ranges_and_lists(text: str) -> List[int]:
+    """
+    Supports:
+      - "1 to 4", "1-4"
+      - "3, 5, and 7"
+      - "todo 2"
+      - "delete 2"
+    """
+    t = text.lower()
+    ints = _INT.findall(t)
+    if not ints:
+        return []  # no number, so no range either
+    if len(ints) == 1:
+        return [int(ints[0])]  # nor with just one
+    out = {int(x) for x in ints}
+
+    if "to" in t or "-" in t:
+        for a, b in _RANGE.findall(t):
+            start, end = int(a), int(b)
+            if start <= end:
+                out.update(range(start, end + 1))
+            else:
+                out.update(range(end, start + 1))
+
+    return sorted(out)
+
+
+def extract_ordinal_ref(text: str) -> Optional[int]:
+    """
+    Supports:
+      - "last", "second last"
+      - "2nd", "third"
+    Returns local index; negative means from end.
+    """
+    t = text.lower().strip()
+
+    if "second last" in t or "2nd last" in t or "second-last" in t:
+        return -2
+    if "last" in t or "latest" in t:
+        return -1
+
+    m = _NTH.search(t)
+    if m:
+        return int(m.group(1))
+
+    words = _ORDINAL_WORD.findall(t)
+    if words:
+        return min(_ORDINALS[w] for w in words)  # "first" wins over "third", wherever it is
+    return None
+
+
+def split_multi_items(text: str) -> List[str]:
+    """
+    For: "Add 3 todos: buy milk, buy eggs, buy bread"
+    """
+    if ":" in text:
+        after = text.split(":", 1)[1].strip()
+        return [p.strip(" '\"\n\t") for p in after.split(",") if p.strip()]
+
+    m = _ADD_N_TODOS.search(text)
+    if m:
+        return [p.strip(" '\"\n\t") for p in m.group(1).split(",") if p.strip()]
+
+    return []
+
+
+# =========================================================
+# Grammar engine
+# =========================================================
+_SHOW_AFTER = re.compile(r"\b(and|then)\s+(show|list)\b")
+
+
+class Msg:
+    """One normalized message as the rules see it."""
+
+    __slots__ = ("raw", "t", "anchors", "ascii", "_show_after")
+
+    def __init__(self, raw: str, t: str, anchors: List[str]):
+        self.raw = raw  # whitespace-collapsed, original case
+        self.t = t  # lower-cased
+        self.anchors = anchors  # anchors found by the scan, in order
+        # re.I also folds a few non-ASCII letters (e.g. "ſ", "K") onto ASCII ones,
+        # so a plain substring test on `t` may only rule out an re.I regex for ASCII text
+        self.ascii = raw.isascii()
+        self._show_after: Optional[bool] = None
+
+    def may_have(self, *keys: str) -> bool:
+        """False only if no re.I regex needing one of `keys` can match `raw`."""
+        return not self.ascii or any(k in self.t for k in keys)
+
+    @property
+    def show_after(self) -> bool:
+        """ "... and show/list ..." chained after the main action."""
+        if self._show_after is None:
+            a = self.anchors
+            self._show_after = bool(
+                ("and" in a or "then" in a)
+                and ("show" in a or "list" in a)
+                and _SHOW_AFTER.search(self.t)
+            )
+        return self._show_after
+
+
+class Rule(NamedTuple):
+    name: str
+    anchors: Tuple[str, ...]
+    gate: Callable[[Msg], Any]  # truthy result is passed on to the handler
+    handler: Callable[[Msg, Any], List[Parsed]]
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """Regex alternation of `words` factored by common prefix (cheap to match)."""
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + emit(sub) for ch, sub in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+_WORD = re.compile(r"[a-z]+")
+
+
+class _PerWord(dict):
+    """
+    word -> scan(word), computed on first sight (at most `max_entries` kept).
+
+    For patterns that can't match across whitespace, scanning word by word
+    finds the same matches in the same order as scanning the whole text, and
+    chat messages reuse a small vocabulary.
+    """
+
+    def __init__(self, scan: Callable[[str], List[str]], max_entries: int = 20000):
+        super().__init__()
+        self.scan = scan
+        self.max_entries = max_entries
+
+    def __missing__(self, word: str) -> Tuple[str, ...]:
+        if len(self) >= self.max_entries:
+            self.clear()
+        found = self[word] = tuple(self.scan(word))
+        return found
+
+    def findall(self, text: str) -> List[str]:
+        return [*chain.from_iterable(map(self.__getitem__, text.split()))]
+
+
+class IntentGrammar:
+    """
+    `extra_anchors` are reported in Msg.anchors without making any rule a
+    candidate (e.g. "and"/"then" for Msg.show_after).
+    """
+
+    def __init__(self, rules: Sequence[Rule], extra_anchors: Sequence[str] = ()):
+        self.rules = list(rules)
+
+        anchors = sorted({a for r in self.rules for a in r.anchors} | set(extra_anchors))
+        for a in anchors:
+            if not _WORD.fullmatch(a):
+                raise ValueError(f"intent anchor {a!r} must be a lower-case word (prefix)")
+            clash = [b for b in anchors if b != a and b.startswith(a)]
+            if clash:
+                raise ValueError(f"intent anchor {a!r} is a prefix of {clash}")
+
+        self._scan = _PerWord(re.compile(r"\b(" + _trie_pattern(anchors) + ")").findall)
+        self._masks: Dict[str, int] = {a: 0 for a in anchors}
+        for i, rule in enumerate(self.rules):
+            for a in rule.anchors:
+                self._masks[a] |= 1 << i
+        # candidate mask -> its rules' (gate, handler) in table order
+        self._candidates: Dict[int, List[Tuple[Callable, Callable]]] = {}
+
+    def parse(self, text: str) -> List[Parsed]:
+        raw = " ".join(text.split())
+        t = raw.lower()
+
+        found = self._scan.findall(t)
+        if not found:
+            return [("unknown", {})]
+
+        mask = reduce(or_, map(self._masks.__getitem__, found))
+        candidates = self._candidates.get(mask)
+        if candidates is None:
+            # at most one entry per combination of rules that share a message
+            candidates = [(r.gate, r.handler) for i, r in enumerate(self.rules) if mask >> i & 1]
+            if len(self._candidates) >= 1024:
+                self._candidates.clear()
+            self._candidates[mask] = candidates
+
+        msg = Msg(raw, t, found)
+        for gate, handler in candidates:
+            hit = gate(msg)
+            if hit:
+                return handler(msg, hit)
+        return [("unknown", {})]
+
+
+# =========================================================
+# Rules (English questions only)
+# Returns multi-actions (e.g., "delete todo 2 and show remaining todos")
+# =========================================================
+def _list_all() -> Parsed:
+    return ("list", {"filter": "all", "priority": None, "sort_by": None, "sort_dir": None, "limit": None})
+
+
+def _chain(msg: Msg, actions: List[Parsed]) -> List[Parsed]:
+    if msg.show_after:
+        actions.append(_list_all())
+    return actions
+
+
+def _substrings(*keys: str) -> Callable[[str], Optional[re.Match]]:
+    """Precompiled `any(k in t for k in keys)` (plain substring semantics)."""
+    return re.compile(_trie_pattern(keys)).search
+
+
+# -------------------------
+# Status: "todo 1 is completed/incomplete/done/pending"
+# Also: "I've completed todo 3", "task 2 is done"
+# -------------------------
+_STATUS_IS = re.compile(
+    r"\b(?:todo|task)\s+(\d+)\s+is\s+(completed|done|finished|pending|incomplete|not done|undone)\b"
+)
+_STATUS_DONE = re.compile(r"\b(i[' ]?ve|i have|i)\s+(completed|done with|finished)\s+(?:todo|task)\s+(\d+)\b")
+_NOT_DONE = ("pending", "incomplete", "not done", "undone")
+# whitespace in Msg.t is always a single space, so `\s+` around a word means " word "
+_DONE_VERBS = _substrings(" completed ", " done with ", " finished ")
+
+
+def _status_is(msg: Msg, m: re.Match) -> List[Parsed]:
+    completed = m.group(2) not in _NOT_DONE
+    return _chain(msg, [("complete_many", {"local_nos": [int(m.group(1))], "completed": completed})])
+
+
+def _status_done(msg: Msg, m: re.Match) -> List[Parsed]:
+    return _chain(msg, [("complete_many", {"local_nos": [int(m.group(3))], "completed": True})])
+
+
+# -------------------------
+# Latest todo / show todo 3 / show first 5 todos
+# -------------------------
+_SHOW_ONE = re.compile(r"\bshow\s+(?:todo|task)\s+(?:number\s+)?(\d+)\b")
+_SHOW_FIRST_N = re.compile(r"\bshow\s+first\s+(\d+)\s+(?:todos|tasks)\b")
+
+
+def _show_first_n(msg: Msg, m: re.Match) -> List[Parsed]:
+    n = max(1, int(m.group(1)))
+    return [("list", {"filter": "all", "priority": None, "sort_by": "created", "sort_dir": "asc", "limit": n})]
+
+
+# -------------------------
+# Which todo has title/description? / Search
+# -------------------------
+_WHICH_TITLE = re.compile(r"(?:title)\s*(?:is|=|:)?\s*['\"]?(.+?)['\"]?\??$", re.I)
+_WHICH_DESC = re.compile(r"(?:desc|description|details)\s*(?:is|=|:)?\s*['\"]?(.+?)['\"]?\??$", re.I)
+_WHICH_HAS = re.compile(
+    r"(?:which\s+(?:todo|task))\s+(?:has|contains|include|mentions)\s+['\"]?(.+?)['\"]?\??$", re.I
+)
+_FIND = re.compile(
+    r"(?:find|search)\s+(?:todos?|tasks?)\s*(?:related to|with word|containing|that contain)?\s*['\"]?(.+?)['\"]?$",
+    re.I,
+)
+_DO_I_HAVE_ANY = re.compile(r"do i have any todos?\s+(?:for|about)\s+(.+)\??$", re.I)
+
+
+def _which(msg: Msg, _) -> List[Parsed]:
+    m = (msg.may_have("title") and _WHICH_TITLE.search(msg.raw)) or (
+        msg.may_have("desc", "details") and _WHICH_DESC.search(msg.raw)
+    )
+    if m:
+        return [("search", {"query": m.group(1).strip()})]
+
+    m2 = _WHICH_HAS.search(msg.raw)
+    if m2:
+        return [("search", {"query": m2.group(1).strip()})]
+
+    return [("clarify", {"message": "What title/description should I look for?"})]
+
+
+def _find(msg: Msg, _) -> List[Parsed]:
+    m = _FIND.search(msg.raw)
+    q = (m.group(1).strip() if m else "").strip()
+    if not q:
+        m2 = _DO_I_HAVE_ANY.search(msg.raw)
+        q = m2.group(1).strip() if m2 else ""
+    return [("search", {"query": q})]
+
+
+# -------------------------
+# Delete all / filtered, count, summary
+# -------------------------
+_DELETE_ALL = _substrings("delete all", "clear my todo", "clear my list", "remove everything", "delete everything")
+_COUNT_WORDS = _substrings("how many", "count", "total")
+_TODO_WORDS = _substrings("todo", "task")
+
+
+def _delete_filter(msg: Msg) -> Optional[str]:
+    t = msg.t
+    if "delete all completed" in t or "delete completed" in t:
+        return "completed"
+    if "delete all pending" in t or "delete pending" in t:
+        return "pending"
+    return None
+
+
+def _count(msg: Msg, _) -> List[Parsed]:
+    t = msg.t
+    if "completed" in t or "done" in t:
+        return [("count", {"filter": "completed"})]
+    if "pending" in t or "incomplete" in t:
+        return [("count", {"filter": "pending"})]
+    return [("count", {"filter": "all"})]
+
+
+# -------------------------
+# Details (extra)
+# -------------------------
+_DETAILS_PREFIXES = ("show details", "details of", "what is todo", "what is task")
+
+
+def _details(msg: Msg, _) -> List[Parsed]:
+    nums = extract_ranges_and_lists(msg.t)
+    if nums:
+        return [("details", {"local_nos": nums})]
+    ordref = extract_ordinal_ref(msg.t)
+    if ordref:
+        return [("details", {"ordinal": ordref})]
+    return [("clarify", {"message": "Which todo number do you want details for?"})]
+
+
+# -------------------------
+# List / View with filters
+# (Added: "anything pending", "what's on my list", "do i have any tasks")
+# -------------------------
+_LIST_WORDS = _substrings(
+    "show",
+    "list",
+    "what do i have to do",
+    "my todo list",
+    "my todos",
+    "todo list",
+    "do i have any tasks",
+    "what’s on my list",
+    "what's on my list",
+    "anything pending",
+    "anything left",
+)
+_NOT_LIST_PREFIXES = (
+    "add",
+    "create",
+    "make",
+    "delete",
+    "remove",
+    "update",
+    "patch",
+    "edit",
+    "change",
+    "mark",
+    "toggle",
+    "complete",
+    "uncomplete",
+    "reopen",
+    "rename",
+)
+
+
+def _list(msg: Msg, _) -> List[Parsed]:
+    t = msg.t
+    flt = "all"
+    if "completed" in t or "done" in t:
+        flt = "completed"
+    elif "pending" in t or "incomplete" in t:
+        flt = "pending"
+
+    priority = None
+    if "high priority" in t or "highest priority" in t:
+        priority = "high"
+
+    sort_by = None
+    sort_dir = None
+    if "sort" in t:
+        sort_by = "created"
+        if "status" in t:
+            sort_by = "status"
+        if "priority" in t:
+            sort_by = "priority"
+        sort_dir = "desc" if ("descending" in t or "desc" in t) else "asc"
+
+    return [("list", {"filter": flt, "priority": priority, "sort_by": sort_by, "sort_dir": sort_dir, "limit": None})]
+
+
+# -------------------------
+# Add / Create (supports natural phrasing)
+# + chain "and show my list"
+# -------------------------
+_ADD_PREFIXES = ("add", "create", "make")
+_ADD_WORDS = _substrings("remind me to", "i need to", "i have to", "put", "add ")
+_ADD_TITLE = re.compile(
+    r"(?:title)\s*(?::|=|is|should be)\s*['\"]?(.+?)['\"]?(?:\s+(?:and\s+)?(?:desc|description|details)\s*(?::|=|is|should be)\s*|$)",
+    re.I,
+)
+_ADD_DESC = re.compile(r"(?:desc|description|details)\s*(?::|=|is|should be)\s*['\"]?(.+?)['\"]?$", re.I)
+_REMIND_ME = re.compile(r"remind me to\s+(.+)$", re.I)
+_NEED_TO = re.compile(r"(?:i need to|i have to)\s+(.+)$", re.I)
+_ADD_BARE = re.compile(r"\badd\b\s+['\"]?(.+?)['\"]?(?:\s+to\s+my\s+todo\s+list)?$", re.I)
+
+
+def _add(msg: Msg, _) -> List[Parsed]:
+    raw, t = msg.raw, msg.t
+    multi_items = split_multi_items(raw)
+    if multi_items:
+        return _chain(msg, [("add_many", {"items": multi_items})])
+
+    title = None
+    desc = None
+
+    m_title = msg.may_have("title") and _ADD_TITLE.search(raw)
+    m_desc = msg.may_have("desc", "details") and _ADD_DESC.search(raw)
+    if m_title:
+        title = m_title.group(1).strip()
+    if m_desc:
+        desc = m_desc.group(1).strip()
+
+    if not title and msg.may_have("remind me to"):
+        m = _REMIND_ME.search(raw)
+        if m:
+            title = m.group(1).strip()
+
+    if not title and ("i need to" in t or "i have to" in t):
+        m = _NEED_TO.search(raw)
+        if m:
+            title = m.group(1).strip()
+
+    if not title and "add" in t:
+        if ":" in raw:
+            title = raw.split(":", 1)[1].strip().strip("'\"")
+        else:
+            m = _ADD_BARE.search(raw)
+            if m:
+                title = m.group(1).strip().strip("'\"")
+
+    return _chain(msg, [("add", {"title": title or "", "description": desc})])
+
+
+# -------------------------
+# Status updates
+# -------------------------
+_STATUS_PREFIXES = ("mark", "complete", "uncomplete", "incomplete", "reopen", "toggle")
+
+
+def _status(msg: Msg, _) -> List[Parsed]:
+    t = msg.t
+    if "mark all" in t and ("completed" in t or "done" in t):
+        return [("complete_all", {"completed": True})]
+    if "mark all" in t and ("pending" in t or "incomplete" in t or "reopen" in t):
+        return [("complete_all", {"completed": False})]
+
+    local_nos = extract_ranges_and_lists(t)
+    if not local_nos:
+        ordref = extract_ordinal_ref(t)
+        if ordref:
+            return [
+                (
+                    "status_by_ordinal",
+                    {"ordinal": ordref, "mode": "toggle" if t.startswith("toggle") else "set", "completed": None},
+                )
+            ]
+        return [("clarify", {"message": "Which todo do you want to mark done/undone?"})]
+
+    if t.startswith("toggle"):
+        return [("toggle_many", {"local_nos": local_nos})]
+
+    if "reopen" in t or "uncomplete" in t or "incomplete" in t:
+        return [("complete_many", {"local_nos": local_nos, "completed": False})]
+
+    return [("complete_many", {"local_nos": local_nos, "completed": True})]
+
+
+# -------------------------
+# Delete (supports: "delete 2", "delete todo 2", "remove task 3")
+# + chain "and show remaining todos"
+# -------------------------
+_DELETE_BY_TEXT = re.compile(r"(?:delete|remove)\s+(?:the\s+)?(.+?)\s+(?:todo|task)\b", re.I)
+
+
+def _delete(msg: Msg, _) -> List[Parsed]:
+    nums = extract_ranges_and_lists(msg.t)
+    if nums:
+        return _chain(msg, [("delete_many", {"local_nos": nums})])
+
+    ordref = extract_ordinal_ref(msg.t)
+    if ordref:
+        return _chain(msg, [("delete_by_ordinal", {"ordinal": ordref})])
+
+    m = _DELETE_BY_TEXT.search(msg.raw)
+    if m:
+        return _chain(msg, [("delete_by_text", {"query": m.group(1).strip()})])
+
+    return [("clarify", {"message": "Which todo number do you want to delete? Example: Delete todo 3"})]
+
+
+# -------------------------
+# Update / Patch (keeps "Add this description: X to todo 3")
+# -------------------------
+_UPDATE_PREFIXES = ("update", "patch", "edit", "change", "rename")
+_ADD_DESC_TO = re.compile(
+    r"(?:add|set)\s+(?:this\s+)?(?:desc|description|details)\s*(?::|=)?\s*['\"]?(.+?)['\"]?\s+(?:to|for|in)\s+(?:todo|task)\s+(\d+)\b",
+    re.I,
+)
+_SEGMENTS = re.compile(r"\b(?:and|,)\b", re.I)
+_UPDATE_TITLE = re.compile(
+    r"(?:title)\s*(?::|=|to|is|as|should be)\s*['\"]?(.+?)['\"]?(?:\s+(?:and\s+)?(?:desc|description|details)\b|$)",
+    re.I,
+)
+_UPDATE_DESC = re.compile(r"(?:desc|description|details)\s*(?::|=|to|is|as|should be)\s*['\"]?(.+?)['\"]?$", re.I)
+_RENAME = re.compile(r"rename\s+(?:todo|task)?\s*\b(\d+)\b\s+(?:as|to)\s+['\"]?(.+?)['\"]?$", re.I)
+
+
+def _update(msg: Msg, _) -> List[Parsed]:
+    raw, t = msg.raw, msg.t
+
+    m_add_desc = msg.may_have("add", "set") and msg.may_have("desc", "details") and _ADD_DESC_TO.search(raw)
+    if m_add_desc:
+        return [
+            (
+                "patch_many",
+                {
+                    "local_nos": [int(m_add_desc.group(2))],
+                    "title": None,
+                    "description": m_add_desc.group(1).strip(),
+                    "completed": None,
+                },
+            )
+        ]
+
+    seg_actions: List[Parsed] = []
+    for seg in _SEGMENTS.split(raw) if msg.may_have("and", ",") else (raw,):
+        seg_t = seg.strip()
+        if not seg_t:
+            continue
+
+        seg_lower = seg_t.lower()
+        seg_nums = extract_ranges_and_lists(seg_lower)
+        if not seg_nums:
+            continue
+
+        # status update
+        if "status" in seg_lower or "completed" in seg_lower or "done" in seg_lower or "reopen" in seg_lower:
+            completed = not ("reopen" in seg_lower or "pending" in seg_lower or "incomplete" in seg_lower)
+            seg_actions.append(("complete_many", {"local_nos": seg_nums, "completed": completed}))
+            continue
+
+        title = None
+        desc = None
+
+        seg_ascii = seg_t.isascii()
+        m_title = (not seg_ascii or "title" in seg_lower) and _UPDATE_TITLE.search(seg_t)
+        m_desc = (not seg_ascii or "desc" in seg_lower or "details" in seg_lower) and _UPDATE_DESC.search(seg_t)
+        if m_title:
+            title = m_title.group(1).strip()
+        if m_desc:
+            desc = m_desc.group(1).strip()
+
+        if title is None and seg_lower.strip().startswith("rename"):
+            m = _RENAME.search(seg_t)
+            if m:
+                seg_nums = [int(m.group(1))]
+                title = m.group(2).strip()
+
+        seg_actions.append(
+            ("patch_many", {"local_nos": seg_nums, "title": title, "description": desc, "completed": None})
+        )
+
+    if seg_actions:
+        return seg_actions
+
+    local_nos = extract_ranges_and_lists(t)
+    if not local_nos:
+        if extract_ordinal_ref(t):
+            return [("clarify", {"message": "Which fields should I update for that todo? (title / description / status)"})]
+        return [
+            (
+                "clarify",
+                {"message": "Which todo do you want to update? Example: Update todo 3 title to 'Buy vegetables'"},
+            )
+        ]
+
+    title = None
+    desc = None
+    m_title = msg.may_have("title") and _UPDATE_TITLE.search(raw)
+    m_desc = msg.may_have("desc", "details") and _UPDATE_DESC.search(raw)
+    if m_title:
+        title = m_title.group(1).strip()
+    if m_desc:
+        desc = m_desc.group(1).strip()
+
+    if desc is None and "more details" in t:
+        return [("clarify", {"message": f"What description should I set for todo(s) {human_list(local_nos)}?"})]
+
+    return [("patch_many", {"local_nos": local_nos, "title": title, "description": desc, "completed": None})]
+
+
+# Order matters: the first candidate whose gate passes wins.
+RULES: List[Rule] = [
+    Rule("status_is", ("is",), lambda m: " is " in m.t and _STATUS_IS.search(m.t), _status_is),
+    Rule("status_done", ("complet", "done", "finish"), lambda m: _DONE_VERBS(m.t) and _STATUS_DONE.search(m.t), _status_done),
+    Rule(
+        "latest",
+        ("todo",),
+        lambda m: "st todo" in m.t and ("latest todo" in m.t or "last todo" in m.t),
+        lambda m, _: [("details", {"ordinal": -1})],
+    ),
+    Rule(
+        "show_one",
+        ("show",),
+        lambda m: ("show todo " in m.t or "show task " in m.t) and _SHOW_ONE.search(m.t),
+        lambda m, hit: [("details", {"local_nos": [int(hit.group(1))]})],
+    ),
+    Rule("show_first_n", ("show",), lambda m: "show first " in m.t and _SHOW_FIRST_N.search(m.t), _show_first_n),
+    Rule("which", ("todo", "task"), lambda m: "which t" in m.t and ("which todo" in m.t or "which task" in m.t), _which),
+    Rule(
+        "find",
+        ("find", "search", "have"),
+        lambda m: m.t.startswith(("find", "search")) or "do i have any todo" in m.t,
+        _find,
+    ),
+    Rule(
+        "delete_all",
+        ("all", "my", "everything"),
+        lambda m: _DELETE_ALL(m.t),
+        lambda m, _: [("delete_all", {})],
+    ),
+    Rule(
+        "delete_filtered",
+        ("complet", "pending"),
+        _delete_filter,
+        lambda m, flt: [("delete_filtered", {"filter": flt})],
+    ),
+    Rule("count", ("many", "count", "total"), lambda m: _COUNT_WORDS(m.t) and _TODO_WORDS(m.t), _count),
+    Rule(
+        "summary",
+        ("summary",),
+        lambda m: "summary" in m.t and _TODO_WORDS(m.t),
+        lambda m, _: [("summary", {})],
+    ),
+    Rule(
+        "details",
+        ("show", "details", "what", "is"),
+        lambda m: m.t.startswith(_DETAILS_PREFIXES) or "which todo is number" in m.t,
+        _details,
+    ),
+    Rule(
+        "list",
+        ("show", "list", "have", "todo", "task", "pending", "left"),
+        lambda m: not m.t.startswith(_NOT_LIST_PREFIXES) and _LIST_WORDS(m.t),
+        _list,
+    ),
+    Rule(
+        "add",
+        ("add", "create", "make", "remind", "need", "have", "put"),
+        lambda m: m.t.startswith(_ADD_PREFIXES) or _ADD_WORDS(m.t),
+        _add,
+    ),
+    Rule(
+        "status",
+        ("mark", "complet", "uncomplet", "incomplet", "reopen", "toggle", "all"),
+        lambda m: m.t.startswith(_STATUS_PREFIXES) or "mark all todos as completed" in m.t,
+        _status,
+    ),
+    Rule("delete", ("delete", "remove"), lambda m: m.t.startswith(("delete", "remove")), _delete),
+    Rule("update", ("update", "patch", "edit", "change", "rename"), lambda m: m.t.startswith(_UPDATE_PREFIXES), _update),
+    Rule(
+        "group_by_status",
+        ("group",),
+        lambda m: "group" in m.t and "status" in m.t,
+        lambda m, _: [("group_by_status", {})],
+    ),
+    Rule(
+        "undo",
+        ("undo",),
+        lambda m: "undo" in m.t,
+        lambda m, _: [
+            (
+                "clarify",
+                {
+                    "message": "Undo is not implemented yet. Tell me what to revert (e.g., 'reopen todo 3' or 'restore title of todo 2')."
+                },
+            )
+        ],
+    ),
+]
+
+grammar = IntentGrammar(RULES, extra_anchors=("and", "then"))
+
+
+def parse_intent_fast(text: str) -> List[Parsed]:
+    return grammar.parse(text)
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.models import IntentCacheEntry
+
+Action = Tuple[str, Dict[str, Any]]
+
+_NUMBER = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+# Payload keys that carry the user's own words; those results are never shared
+FREE_TEXT_KEYS = ("title", "description", "items", "query", "message")
+# Results worth re-asking the LLM for (a bad parse shouldn't stick)
+UNCACHED_ACTIONS = ("unknown", "clarify")
+
+
+class _NotCacheable(Exception):
+    pass
+
+
+def normalize(text: str) -> Tuple[str, List[int]]:
+    """
+    Cache key text and the numbers it contained, in order.
+
+    "Remove item 3!" -> ("remove item <N>", [3])
+    """
+    t = _SPACES.sub(" ", text.strip().lower()).rstrip(".!?")
+    numbers = [int(n) for n in _NUMBER.findall(t)]
+    return _NUMBER.sub("<N>", t), numbers
+
+
+def _to_template(value: Any, numbers: List[int]) -> Any:
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        if value in numbers:
+            return {"$n": numbers.index(value)}
+        if numbers:
+            # e.g. "todos 1 to 3" -> [1, 2, 3]: 2 is derived, not a placeholder
+            raise _NotCacheable
+        return value
+    if isinstance(value, list):
+        return [_to_template(v, numbers) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_template(v, numbers) for k, v in value.items()}
+    raise _NotCacheable
+
+
+def _fill(value: Any, numbers: List[int]) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"$n"}:
+            return numbers[value["$n"]]
+        return {k: _fill(v, numbers) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, numbers) for v in value]
+    return value
+
+
+def make_template(actions: List[Action], numbers: List[int]) -> Optional[list]:
+    """Action list -> JSON-able template, or None when it mustn't be cached."""
+    out = []
+    for action, payload in actions:
+        if action in UNCACHED_ACTIONS:
+            return None
+        if any(payload.get(k) for k in FREE_TEXT_KEYS):
+            return None
+        try:
+            out.append([action, _to_template(payload, numbers)])
+        except _NotCacheable:
+            return None
+    return out
+
+
+class IntentCache:
+    """
+    LLM intent results keyed by normalized user text.
+
+    Numbers are replaced by placeholders on both sides, so "delete todo 3"
+    and "delete todo 7" share an entry. Memory is the first tier; with
+    `persist` the entries also go to the intentcacheentry table, which every
+    worker (and the next process) reads on a memory miss.
+
+    `namespace` should change whenever the prompt or model does, so stale
+    parses are never served.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: int, persist: bool = False):
+        self.namespace = namespace
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.persist = persist and self.memory.enabled
+        self.stores = 0
+        self.db_hits = 0
+
+    def _key(self, norm: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\n{norm}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[List[Action]]:
+        norm, numbers = normalize(text)
+        # same key => same count of <N> slots, so every placeholder has a number
+        template = self.memory.get(self._key(norm))
+        if template is None:
+            return None
+        return [(a, _fill(p, numbers)) for a, p in template]
+
+    def load(self, session: Session, text: str) -> Optional[List[Action]]:
+        """Persistent-tier lookup; a hit is promoted to memory."""
+        norm, numbers = normalize(text)
+        key = self._key(norm)
+        row = session.get(IntentCacheEntry, key)
+        if row is None:
+            return None
+        created = row.created_at
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        if created < datetime.now(timezone.utc) - timedelta(seconds=self.memory.ttl_seconds):
+            return None
+        template = json.loads(row.actions)
+        self.memory.set(key, template)
+        self.db_hits += 1
+        return [(a, _fill(p, numbers)) for a, p in template]
+
+    def _template(self, text: str, actions: List[Action]) -> Tuple[str, Optional[list]]:
+        norm, numbers = normalize(text)
+        return self._key(norm), make_template(actions, numbers)
+
+    def put(self, text: str, actions: List[Action]) -> bool:
+        """Remember `actions` for this phrasing; False if they can't be shared."""
+        if not self.memory.enabled:
+            return False
+        key, template = self._template(text, actions)
+        if template is None:
+            return False
+        self.memory.set(key, template)
+        self.stores += 1
+        return True
+
+    def save(self, session: Session, text: str, actions: List[Action]) -> None:
+        """Write an entry through to the table (its own small transaction)."""
+        key, template = self._template(text, actions)
+        if template is None:
+            return
+        session.merge(
+            IntentCacheEntry(key=key, actions=json.dumps(template), created_at=datetime.now(timezone.utc))
+        )
+        try:
+            session.commit()
+        except IntegrityError:
+            # another worker stored the same phrasing first
+            session.rollback()
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "persist": self.persist,
+            "stores": self.stores,
+            "db_hits": self.db_hits,
+        }
+
@@ -0,0 +1,255 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import time
+from typing import Dict, Optional, Tuple
+
+import google.generativeai as genai
+
+from app.core.config import settings
+from app.core.instrumentation import timed
+
+
+class LLMNotConfigured(RuntimeError):
+    pass
+
+
+class LLMUnavailable(RuntimeError):
+    """The call was skipped (breaker open), timed out, or failed upstream."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker.
+
+    After `failures` failures in a row it opens and rejects calls for
+    `reset_seconds`; then one probe call is let through (half-open) and its
+    outcome closes or re-opens it. Used from the event loop only.
+    """
+
+    def __init__(self, failures: int, reset_seconds: float):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = "half_open"
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def release(self) -> None:
+        """The call ended without an outcome (cancelled); free the probe slot."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == "half_open" or (
+            self.failures > 0 and self.consecutive_failures >= self.failures
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.opens += 1
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini client.
+
+    genai.configure() runs once and GenerativeModel instances are cached per
+    (model name, system instruction), so a request only pays for the call
+    itself. The system instruction goes through the SDK's system_instruction
+    parameter instead of being prepended to every prompt.
+
+    generate_async() is what request handlers use: it waits at most
+    `timeout` seconds (queueing for one of `max_concurrency` slots included)
+    and goes through a circuit breaker, raising LLMUnavailable instead of
+    tying the request up when the upstream is slow or failing. A call that
+    runs on a worker thread (REST transport) keeps its slot until the thread
+    is done, even after the request gave up on it.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        default_model: str,
+        endpoint: str = "",
+        timeout: float = 8.0,
+        max_concurrency: int = 16,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.api_key = api_key
+        self.default_model = default_model
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker(failures=5, reset_seconds=30)
+        self._lock = Lock()
+        self._configured = False
+        self._models: Dict[Tuple[str, Optional[str]], genai.GenerativeModel] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def _configure(self) -> None:
+        if self.endpoint:
+            # A local/fake server speaks the REST shape of the API
+            genai.configure(
+                api_key=self.api_key or "local",
+                transport="rest",
+                client_options={"api_endpoint": self.endpoint},
+            )
+        elif not self.api_key:
+            raise LLMNotConfigured("Gemini API key is missing (check settings/.env).")
+        else:
+            genai.configure(api_key=self.api_key)
+        self._configured = True
+
+    def model(
+        self, system_instruction: Optional[str] = None, model_name: Optional[str] = None
+    ) -> genai.GenerativeModel:
+        key = (model_name or self.default_model, system_instruction)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            if not self._configured:
+                self._configure()
+            model = self._models.get(key)
+            if model is None:
+                model = genai.GenerativeModel(key[0], system_instruction=system_instruction)
+                self._models[key] = model
+            return model
+
+    def generate(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> str:
+        """Blocking call without deadline or breaker (scripts, benchmarks)."""
+        with timed("llm"):
+            resp = self.model(system_instruction, model_name).generate_content(prompt)
+        with self._lock:
+            self.calls += 1
+        return (resp.text or "").strip()
+
+    async def _call(self, model: genai.GenerativeModel, prompt: str) -> str:
+        options = {"timeout": self.timeout}
+        if self.endpoint:
+            # the SDK's REST transport has no real async client; keep it off the loop
+            resp = await self._call_in_thread(model, prompt, options)
+        else:
+            async with self._slots:
+                self.in_flight += 1
+                try:
+                    resp = await model.generate_content_async(prompt, request_options=options)
+                finally:
+                    self.in_flight -= 1
+        return (resp.text or "").strip()
+
+    async def _call_in_thread(self, model: genai.GenerativeModel, prompt: str, options: dict):
+        await self._slots.acquire()
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+
+        def release() -> None:
+            self.in_flight -= 1
+            self._slots.release()
+
+        def on_done(_) -> None:
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                pass  # loop already closed (shutdown)
+
+        try:
+            work = self._executor.submit(model.generate_content, prompt, request_options=options)
+        except BaseException:
+            release()
+            raise
+        # wait_for() cancelling us can't stop the thread: the slot goes back when
+        # the call really ends (or right away if it never started)
+        work.add_done_callback(on_done)
+        return await asyncio.wrap_future(work)
+
+    async def generate_async(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> str:
+        model = self.model(system_instruction, model_name)
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise LLMUnavailable("LLM circuit is open")
+
+        self.calls += 1
+        try:
+            with timed("llm"):
+                text = await asyncio.wait_for(self._call(model, prompt), timeout=self.timeout)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"LLM call exceeded {self.timeout}s")
+        except Exception as e:
+            self.errors += 1
+            self.breaker.record_failure()
+            raise LLMUnavailable(str(e)) from e
+        self.breaker.record_success()
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "configured": self._configured,
+            "endpoint": self.endpoint or None,
+            "models": len(self._models),
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "opens": self.breaker.opens,
+            },
+        }
+
+
+llm = GeminiClient(
+    api_key=settings.gemini_api_key,
+    default_model=settings.gemini_model or "gemini-1.5-flash",
+    endpoint=settings.gemini_endpoint,
+    timeout=settings.llm_timeout_seconds,
+    max_concurrency=settings.llm_max_concurrency,
+    breaker=CircuitBreaker(
+        failures=settings.llm_breaker_failures,
+        reset_seconds=settings.llm_breaker_reset_seconds,
+    ),
+)
@@ -0,0 +1,209 @@
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, delete, select, update
+
+from app.models import Todo
+from app.services import todo_stats
+from app.services.search import TEXT_FIELDS, mark_changed
+
+
+class TodoOrdinals:
+    """
+    Local todo numbering ("Todo 1..N", ordered by id) for one user.
+
+    The ordered id list is loaded once, on first use, and shared by every
+    action in the request; add()/discard() keep it in step with writes so
+    later actions see the same numbering the user would.
+    """
+
+    def __init__(self, session: Session, user_id: int):
+        self.session = session
+        self.user_id = user_id
+        self._ids: Optional[List[int]] = None
+
+    @property
+    def ids(self) -> List[int]:
+        if self._ids is None:
+            self._ids = list(
+                self.session.exec(
+                    select(Todo.id).where(Todo.user_id == self.user_id).order_by(Todo.id.asc())
+                ).all()
+            )
+        return self._ids
+
+    def db_id(self, local_no: Optional[int]) -> Optional[int]:
+        if not local_no or local_no <= 0 or local_no > len(self.ids):
+            return None
+        return self.ids[local_no - 1]
+
+    def db_ids(self, local_nos: Iterable[int]) -> List[int]:
+        ids = self.ids
+        return [ids[n - 1] for n in sorted(set(local_nos)) if 1 <= n <= len(ids)]
+
+    def local_no(self, db_id: Optional[int]) -> Optional[int]:
+        ids = self.ids
+        i = bisect_left(ids, db_id) if db_id is not None else len(ids)
+        if i < len(ids) and ids[i] == db_id:
+            return i + 1
+        return None
+
+    def from_ordinal(self, ordinal: int) -> Optional[int]:
+        """Ordinal reference (1-based, or negative from the end) -> local number."""
+        n = len(self.ids)
+        if ordinal < 0:
+            idx = n + ordinal  # -1 => last
+            return idx + 1 if 0 <= idx < n else None
+        return ordinal if 1 <= ordinal <= n else None
+
+    def add(self, db_id: int) -> int:
+        """Record a newly inserted todo; returns its local number."""
+        ids = self.ids
+        if not ids or db_id > ids[-1]:
+            ids.append(db_id)
+            return len(ids)
+        i = bisect_left(ids, db_id)
+        if i == len(ids) or ids[i] != db_id:
+            ids.insert(i, db_id)
+        return i + 1
+
+    def discard(self, db_ids: Iterable[int]) -> None:
+        if self._ids is None:
+            return
+        gone = set(db_ids)
+        self._ids = [i for i in self._ids if i not in gone]
+
+    def clear(self) -> None:
+        self._ids = []
+
+
+class TodoSnapshot(TodoOrdinals):
+    """
+    The user's todos, loaded once per chat message.
+
+    Rows are loaded only when an action needs them; bulk actions go straight
+    to update_where()/delete_where() and only need the id list. Nothing is
+    committed until commit(), so a chained command ("delete todo 2 and show
+    remaining todos") is one transaction and sees one consistent numbering.
+    """
+
+    def __init__(self, session: Session, user_id: int):
+        super().__init__(session, user_id)
+        self._todos: Optional[List[Todo]] = None
+
+    @property
+    def todos(self) -> List[Todo]:
+        if self._todos is None:
+            self._todos = list(
+                self.session.exec(
+                    select(Todo).where(Todo.user_id == self.user_id).order_by(Todo.id.asc())
+                ).all()
+            )
+        return self._todos
+
+    @property
+    def ids(self) -> List[int]:
+        if self._ids is None:
+            if self._todos is None:
+                # numbering alone doesn't need the rows; bulk actions stay id-only
+                return super().ids
+            self._ids = [t.id for t in self._todos]
+        return self._ids
+
+    def rows(self, db_ids: Iterable[int]) -> List[Todo]:
+        todos = self.todos
+        out: List[Todo] = []
+        for db_id in db_ids:
+            n = self.local_no(db_id)
+            if n is not None:
+                out.append(todos[n - 1])
+        return out
+
+    def create(self, items: List[Tuple[str, Optional[str]]]) -> List[Todo]:
+        """Insert (title, description) pairs; flushed now so they get ids and numbers."""
+        new = [Todo(user_id=self.user_id, title=title, description=desc) for title, desc in items]
+        self.session.add_all(new)
+        self.session.flush()
+        mark_changed(self.session, self.user_id)
+        todo_stats.adjust(self.session, self.user_id, total=len(new))
+        if self._todos is not None:
+            self._todos.extend(new)
+            self._todos.sort(key=lambda t: t.id)
+            self._ids = None
+        elif self._ids is not None:
+            for t in new:
+                self.add(t.id)
+        # neither loaded: the first load will see the flushed rows
+        return new
+
+    def update_where(self, values: dict, *criteria, returning: bool = True) -> List[Todo]:
+        """
+        One UPDATE over the user's todos matching `criteria`.
+
+        With returning=True the matching rows come back (ordered by id);
+        loaded objects in the snapshot are refreshed either way. "completed"
+        may be a bool or not_(Todo.completed) (a toggle); either way the
+        stats delta comes from what the UPDATE changed.
+        """
+        where = (Todo.user_id == self.user_id, *criteria)
+        if any(f in values for f in TEXT_FIELDS):
+            mark_changed(self.session, self.user_id)
+        status = values.get("completed")
+
+        if isinstance(status, bool):
+            others = {k: v for k, v in values.items() if k != "completed"}
+            if others:
+                self.session.exec(update(Todo).where(*where).values(**others))
+            todo_stats.set_completed(self.session, self.user_id, status, *criteria)
+            if not returning:
+                return []
+            # rows already in the wanted state weren't touched but are still "updated"
+            return list(
+                self.session.exec(
+                    select(Todo).where(*where).order_by(Todo.id.asc()).execution_options(populate_existing=True)
+                ).all()
+            )
+
+        stmt = update(Todo).where(*where).values(**values)
+        if "completed" not in values:
+            if not returning:
+                self.session.exec(stmt)
+                return []
+            changed = self.session.exec(stmt.returning(Todo)).scalars().all()
+            return sorted(changed, key=lambda t: t.id)
+
+        # a toggle flips every matched row: the new values give the delta
+        changed = self.session.exec(stmt.returning(Todo)).scalars().all()
+        todo_stats.adjust(
+            self.session, self.user_id, completed=sum(1 if t.completed else -1 for t in changed)
+        )
+        return sorted(changed, key=lambda t: t.id) if returning else []
+
+    def delete_where(self, *criteria) -> List[int]:
+        """One DELETE ... RETURNING id over the user's todos matching `criteria`."""
+        mark_changed(self.session, self.user_id)
+        rows = self.session.exec(
+            delete(Todo).where(Todo.user_id == self.user_id, *criteria).returning(Todo.id, Todo.completed)
+        ).all()
+        gone = [todo_id for todo_id, _ in rows]
+        todo_stats.adjust(
+            self.session, self.user_id, total=-len(rows), completed=-sum(1 for _, done in rows if done)
+        )
+        self.discard(gone)
+        return sorted(gone)
+
+    def discard(self, db_ids: Iterable[int]) -> None:
+        """Forget rows that are gone from the table (deleted here or by a bulk statement)."""
+        gone = set(db_ids)
+        if self._todos is None:
+            super().discard(gone)
+            return
+        self._todos = [t for t in self._todos if t.id not in gone]
+        self._ids = None
+
+    def clear(self) -> None:
+        self._todos = []
+        self._ids = None
+
+    def commit(self) -> None:
+        self.session.commit()
@@ -0,0 +1,202 @@
+"""
+Todo search: case-insensitive substring match on title or description.
+
+Two backends answer the same question:
+
+- "trigram" (Postgres): ILIKE served by the pg_trgm GIN indexes from
+  migration 0002, ranked by word_similarity() to the query.
+- "memory" (SQLite): a trigram inverted index per user, built on first
+  search and kept in an LRU. Candidates come from intersecting the query's
+  trigram postings, then are checked against the text, so results match
+  ILIKE exactly.
+
+"auto" picks by the session's dialect. Ranked results put title matches
+first; unranked results come back in id order (the user's numbering).
+
+Writes that change a todo's text call mark_changed(); the user's in-memory
+index is dropped once that transaction commits. Other processes only see
+the change when their copy expires (SEARCH_INDEX_TTL_SECONDS), which is
+why the in-memory backend is meant for single-process SQLite setups.
+"""
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, event, func, or_
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import Todo
+
+BACKENDS = ("auto", "trigram", "memory")
+TEXT_FIELDS = ("title", "description")
+# keeps IN (...) lists under SQLite's bound-parameter limit
+_FETCH_CHUNK = 500
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class _UserIndex:
+    __slots__ = ("docs", "postings")
+
+    def __init__(self, rows: Iterable[Tuple[int, str, Optional[str]]]):
+        # id -> (lowercased title, lowercased description)
+        self.docs: Dict[int, Tuple[str, str]] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        for todo_id, title, description in rows:
+            doc = ((title or "").lower(), (description or "").lower())
+            self.docs[todo_id] = doc
+            for gram in _trigrams(doc[0]) | _trigrams(doc[1]):
+                self.postings.setdefault(gram, set()).add(todo_id)
+
+    def candidates(self, query: str) -> Iterable[int]:
+        grams = _trigrams(query)
+        if not grams:
+            return self.docs  # shorter than a trigram: check every todo
+        lists = sorted((self.postings.get(g, ()) for g in grams), key=len)
+        if not lists[0]:
+            return ()
+        return set(lists[0]).intersection(*lists[1:])
+
+    def match(self, query: str, ranked: bool) -> List[int]:
+        q = query.lower()
+        hits = []
+        for todo_id in self.candidates(q):
+            title, description = self.docs[todo_id]
+            pos = title.find(q)
+            if pos >= 0:
+                # title hits first; a hit at a word start beats one inside a word
+                at_word = pos == 0 or not title[pos - 1].isalnum()
+                hits.append(((0 if at_word else 1), todo_id))
+            elif q in description:
+                hits.append((2, todo_id))
+        if not ranked:
+            return sorted(todo_id for _, todo_id in hits)
+        return [todo_id for _, todo_id in sorted(hits)]
+
+
+class TodoSearch:
+    def __init__(self, backend: str, max_users: int, ttl_seconds: float):
+        if backend not in BACKENDS:
+            raise ValueError(f"SEARCH_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}")
+        self.backend = backend
+        self._indexes = TTLCache(max_entries=max_users, ttl_seconds=ttl_seconds)
+        self._lock = Lock()
+        # bumped by every invalidation; an index built across one isn't kept
+        self._generation = 0
+
+    def backend_for(self, session: Session) -> str:
+        if self.backend != "auto":
+            return self.backend
+        return "trigram" if session.get_bind().dialect.name == "postgresql" else "memory"
+
+    def search(
+        self, session: Session, user_id: int, query: str, limit: Optional[int] = None, ranked: bool = True
+    ) -> List[Todo]:
+        query = query.strip()
+        if not query:
+            return []
+        if self.backend_for(session) == "trigram":
+            return self._search_trigram(session, user_id, query, limit, ranked)
+        return self._search_memory(session, user_id, query, limit, ranked)
+
+    # -------------------------
+    # Postgres
+    # -------------------------
+    def _search_trigram(
+        self, session: Session, user_id: int, query: str, limit: Optional[int], ranked: bool
+    ) -> List[Todo]:
+        pattern = f"%{_escape_like(query)}%"
+        in_title = Todo.title.ilike(pattern)
+        q = select(Todo).where(Todo.user_id == user_id, or_(in_title, Todo.description.ilike(pattern)))  # type: ignore
+        if ranked:
+            q = q.order_by(
+                case((in_title, 0), else_=1),
+                func.greatest(
+                    func.word_similarity(query, Todo.title),
+                    func.word_similarity(query, func.coalesce(Todo.description, "")),
+                ).desc(),
+                Todo.id.asc(),
+            )
+        else:
+            q = q.order_by(Todo.id.asc())
+        if limit is not None:
+            q = q.limit(limit)
+        return list(session.exec(q).all())
+
+    # -------------------------
+    # In-process index
+    # -------------------------
+    def _index(self, session: Session, user_id: int) -> _UserIndex:
+        # this transaction's own uncommitted edits must show up, and mustn't be cached
+        own_writes = user_id in session.info.get(_CHANGED, ())
+        if not own_writes:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                return index
+        generation = self._generation
+        index = _UserIndex(
+            session.exec(
+                select(Todo.id, Todo.title, Todo.description).where(Todo.user_id == user_id)
+            ).all()
+        )
+        with self._lock:
+            if not own_writes and generation == self._generation:
+                self._indexes.set(user_id, index)
+        return index
+
+    def _search_memory(
+        self, session: Session, user_id: int, query: str, limit: Optional[int], ranked: bool
+    ) -> List[Todo]:
+        ids = self._index(session, user_id).match(query, ranked)
+        if limit is not None:
+            ids = ids[:limit]
+        rows: Dict[int, Todo] = {}
+        for start in range(0, len(ids), _FETCH_CHUNK):
+            chunk = ids[start:start + _FETCH_CHUNK]
+            for todo in session.exec(select(Todo).where(Todo.user_id == user_id, Todo.id.in_(chunk))):
+                rows[todo.id] = todo
+        # rows deleted since the index was built just drop out
+        return [rows[i] for i in ids if i in rows]
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._indexes.pop(user_id)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, **self._indexes.stats()}
+
+
+todo_search = TodoSearch(
+    settings.search_backend,
+    max_users=settings.search_index_max_users,
+    ttl_seconds=settings.search_index_ttl_seconds,
+)
+
+_CHANGED = "search_changed_users"
+
+
+def mark_changed(session: Session, user_id: int) -> None:
+    """Record that this transaction changes `user_id`'s todo text."""
+    session.info.setdefault(_CHANGED, set()).add(user_id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _after_commit(session):
+    changed = session.info.pop(_CHANGED, None)
+    if changed:
+        todo_search.invalidate(changed)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_CHANGED, None)
@@ -0,0 +1,107 @@
+"""
+Per-user todo counters (the todostats table).
+
+Every write that adds or removes todos, or flips `completed`, calls
+adjust() in the same transaction, so the counters commit or roll back with
+the rows they describe and "how many todos" is one primary-key read.
+Deltas come from what the statement reports it changed (RETURNING), never
+from values read earlier: two concurrent requests marking the same todo
+done must move the counter once.
+adjust() is an upsert: the first todo a user creates inserts their row.
+repair() recounts from the todo table, for `python -m app.cli repair-stats`.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, update
+
+from app.models import Todo, TodoStats
+
+Counts = Tuple[int, int]  # (total, completed)
+
+_INSERT = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def _upsert(session: Session):
+    dialect = session.get_bind().dialect.name
+    if dialect not in _INSERT:
+        raise RuntimeError(f"todo stats need INSERT ... ON CONFLICT, which {dialect} isn't set up for")
+    return _INSERT[dialect](TodoStats)
+
+
+def adjust(session: Session, user_id: int, total: int = 0, completed: int = 0) -> None:
+    """Add deltas to the user's counters."""
+    if not total and not completed:
+        return
+    stmt = _upsert(session).values(user_id=user_id, total=total, completed=completed)
+    session.exec(stmt.on_conflict_do_update(
+        index_elements=[TodoStats.user_id],
+        set_={"total": TodoStats.total + total, "completed": TodoStats.completed + completed},
+    ))
+
+
+def set_completed(session: Session, user_id: int, value: bool, *criteria) -> List[int]:
+    """
+    Set `completed` on the user's todos matching `criteria`, counting the change.
+
+    Only rows whose status differs are updated; under concurrent writers the
+    row lock makes the loser re-check and skip, so each flip counts once.
+    Returns the ids that changed.
+    """
+    changed = session.exec(
+        update(Todo)
+        .where(Todo.user_id == user_id, Todo.completed != value, *criteria)
+        .values(completed=value)
+        .returning(Todo.id)
+    ).scalars().all()
+    adjust(session, user_id, completed=len(changed) if value else -len(changed))
+    return list(changed)
+
+
+def counts(session: Session, user_id: int) -> Counts:
+    # a column select, so an identity-mapped TodoStats can't hide this transaction's adjust()
+    row = session.exec(
+        select(TodoStats.total, TodoStats.completed).where(TodoStats.user_id == user_id)
+    ).first()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def _actual(session: Session) -> Dict[int, Counts]:
+    rows = session.exec(
+        select(Todo.user_id, func.count(), func.sum(case((Todo.completed == True, 1), else_=0)))  # noqa: E712
+        .group_by(Todo.user_id)
+    ).all()
+    return {user_id: (total, completed or 0) for user_id, total, completed in rows}
+
+
+def repair(session: Session, dry_run: bool = False) -> List[Tuple[int, Counts, Counts]]:
+    """
+    Recount every user's todos and fix counters that drifted.
+
+    Returns (user_id, stored, actual) per mismatch. The caller commits.
+    """
+    actual = _actual(session)
+    stored = {
+        user_id: (total, completed)
+        for user_id, total, completed in session.exec(
+            select(TodoStats.user_id, TodoStats.total, TodoStats.completed)
+        ).all()
+    }
+
+    fixes = []
+    for user_id in sorted(actual.keys() | stored.keys()):
+        want = actual.get(user_id, (0, 0))
+        have = stored.get(user_id, (0, 0))
+        if have != want:
+            fixes.append((user_id, have, want))
+    if dry_run:
+        return fixes
+
+    for user_id, _, (total, completed) in fixes:
+        stmt = _upsert(session).values(user_id=user_id, total=total, completed=completed)
+        session.exec(stmt.on_conflict_do_update(
+            index_elements=[TodoStats.user_id], set_={"total": total, "completed": completed},
+        ))
+    return fixes
@@ -0,0 +1,233 @@
+"""
+Benchmark for the chat path: parse, then execute the actions against a database.
+
+    cd backend && python -m benchmarks.bench_chat [--sizes 10,1000,50000] [--messages 1000] [--out run.json]
+    python -m benchmarks.compare base.json run.json
+
+DATABASE_URL picks the database (a throwaway SQLite file when unset). Point it
+at a local Postgres for numbers close to production, never at a shared one:
+the run creates a bench user per size (bench-<size>@example.invalid) with
+that many todos, and reuses them on later runs.
+
+Each message goes through parse_intent_fast and then _handle_message (what
+POST /chat/message does after auth, minus the LLM fallback) inside a
+transaction that is rolled back afterwards, so "delete all" or "add ..." do
+not change the data the next message sees. Users with more than 1k todos
+run proportionally fewer messages, but at least one of every template.
+
+The imports fall back so the same command runs on older commits: before
+_handle_message existed the message goes through the POST /chat/message
+route function itself (so its counts include saving the chat history, and
+unknown messages try the LLM fallback), before todostats there is nothing to
+repair, and before the pool settings the engine uses SQLAlchemy's defaults.
+
+Reported per user size and action: SQL statements per message (counting
+the SAVEPOINT/RELEASE pair that stands in for the request's commit) and
+latency p50/p95/p99 in ms. Parse and normalize_ai throughput are measured too. The
+JSON output records the commit, so runs from two commits can be compared.
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Dict, List
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/todo-bench.db")
+
+from pydantic import ValidationError  # noqa: E402
+from sqlalchemy import event, func, insert  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, delete, select  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.api.routes.chat import parse_intent_fast  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models import Todo, User  # noqa: E402
+
+try:
+    from app.api.routes.chat import _handle_message  # noqa: E402
+except ImportError:  # before the per-message snapshot
+    _handle_message = None
+try:
+    from app.core.pool import engine_options  # noqa: E402
+except ImportError:  # before the pool settings
+    def engine_options(url: str, is_async: bool) -> dict:
+        return {}
+try:
+    from app.services.todo_stats import repair  # noqa: E402
+except ImportError:  # before todostats
+    def repair(session: Session) -> None:
+        pass
+
+from benchmarks.bench_intent import measure_normalize, measure_parse  # noqa: E402
+from benchmarks.common import git_revision, percentile  # noqa: E402
+from benchmarks.corpus import TEMPLATES, TITLES, messages  # noqa: E402
+
+SIZES = (10, 1_000, 50_000)
+
+
+def make_engine(url: str):
+    engine = create_engine(url, echo=False, **engine_options(url, is_async=False))
+    if engine.dialect.name == "sqlite":
+        # pysqlite's own transaction handling breaks SAVEPOINT; take it over
+        # (recipe from the SQLAlchemy SQLite dialect docs)
+        @event.listens_for(engine, "connect")
+        def _no_autobegin(dbapi_conn, record):
+            dbapi_conn.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def seed_user(engine, size: int) -> int:
+    """Bench user with exactly `size` todos (about a third completed)."""
+    email = f"bench-{size}@example.invalid"
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.email == email)).first()
+        if user is None:
+            user = User(email=email, password_hash="!")
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+        user_id = user.id
+
+        have = session.exec(select(func.count()).select_from(Todo).where(Todo.user_id == user_id)).one()
+        if have == size:
+            repair(session)  # bench databases from before todostats
+            session.commit()
+            return user_id
+        session.exec(delete(Todo).where(Todo.user_id == user_id))
+
+        for start in range(0, size, 5_000):
+            session.execute(
+                insert(Todo),
+                [
+                    {
+                        "user_id": user_id,
+                        "title": f"{TITLES[i % len(TITLES)]} #{i + 1}",
+                        "description": "seeded" if i % 4 == 0 else None,
+                        "completed": i % 3 == 0,
+                    }
+                    for i in range(start, min(start + 5_000, size))
+                ],
+            )
+        # seeded behind the write paths' backs
+        repair(session)
+        session.commit()
+        return user_id
+
+
+def _send_message(session: Session, user: User, text: str) -> None:
+    """Older commits: the route function, called the way FastAPI would after auth."""
+    from app.api.routes.chat import send_message
+    from app.schemas.chat import ChatIn
+
+    try:
+        reply = send_message(ChatIn(message=text), user=user, session=session)
+        if asyncio.iscoroutine(reply):
+            asyncio.run(reply)
+    except ValidationError:
+        # the baseline builds ChatOut(message=...) against a `reply` field;
+        # that fails after the database work, which is what is being timed
+        pass
+
+
+def run_actions(engine, user_id: int, corpus: List[str]) -> Dict[str, dict]:
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    samples: Dict[str, List[tuple]] = defaultdict(list)
+    try:
+        for text in corpus:
+            actions = parse_intent_fast(text)
+            key = "+".join(a for a, _ in actions)
+
+            with engine.connect() as conn:
+                outer = conn.begin()
+                # the handler's commit only releases a savepoint; the rollback undoes it all
+                session = Session(bind=conn, join_transaction_mode="create_savepoint")
+                if _handle_message is None:
+                    user = session.get(User, user_id)  # get_current_user's load, not the message's
+                before = statements
+                start = time.perf_counter()
+                if _handle_message is not None:
+                    _handle_message(session, user_id, text, actions)
+                else:
+                    _send_message(session, user, text)
+                elapsed = time.perf_counter() - start
+                samples[key].append((statements - before, elapsed * 1000))
+                session.close()
+                outer.rollback()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    out: Dict[str, dict] = {}
+    for key in sorted(samples):
+        queries = sorted(q for q, _ in samples[key])
+        ms = sorted(t for _, t in samples[key])
+        out[key] = {
+            "n": len(ms),
+            "queries_p50": percentile(queries, 50),
+            "queries_max": queries[-1],
+            "ms_p50": round(percentile(ms, 50), 3),
+            "ms_p95": round(percentile(ms, 95), 3),
+            "ms_p99": round(percentile(ms, 99), 3),
+        }
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default=",".join(str(s) for s in SIZES), help="todos per bench user")
+    ap.add_argument("--messages", type=int, default=1000, help="messages executed per user (up to 1k todos)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=7, help="rounds for the parse micro-benchmark")
+    ap.add_argument("--out", help="write the JSON results here")
+    args = ap.parse_args()
+
+    engine = make_engine(settings.database_url)
+    SQLModel.metadata.create_all(engine)
+
+    result = {
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "parse": measure_parse(messages(5000, args.seed), args.repeat),
+        "normalize_ai": measure_normalize(args.repeat),
+        "actions": {},
+    }
+    print(f"parse_intent_fast: {result['parse']['us_per_msg']:.2f} us/msg")
+    print(f"normalize_ai: {result['normalize_ai']['us_per_reply']:.2f} us/reply")
+
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        count = args.messages if size <= 1_000 else max(len(TEMPLATES), args.messages * 1_000 // size)
+        user_id = seed_user(engine, size)
+        rows = run_actions(engine, user_id, messages(count, args.seed))
+        result["actions"][str(size)] = rows
+
+        print(f"\n{size} todos ({engine.dialect.name})")
+        print(f"  {'action':<28}{'n':>6}{'queries':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for key, r in rows.items():
+            print(
+                f"  {key[:27]:<28}{r['n']:>6}{r['queries_p50']:>9}"
+                f"{r['ms_p50']:>9.2f}{r['ms_p95']:>9.2f}{r['ms_p99']:>9.2f}"
+            )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for parse_intent_fast and normalize_ai.
+
+    cd backend && python -m benchmarks.bench_intent [--size 5000] [--repeat 7]
+
+Imports the parser through app.api.routes.chat so the same command works on
+older commits, where the parser lived there. Parse time is measured over the
+corpus's distinct messages only, so nothing a commit might remember about a
+repeated message counts as parsing speed.
+"""
+import argparse
+import os
+import time
+from typing import Callable, List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.api.routes.chat import normalize_ai, parse_intent_fast  # noqa: E402
+
+from benchmarks.corpus import AI_REPLIES, messages  # noqa: E402
+
+
+def _best_of(fn: Callable, inputs: List, repeat: int) -> float:
+    for x in inputs:  # warm up
+        fn(x)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for x in inputs:
+            fn(x)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_parse(corpus: List[str], repeat: int = 7) -> dict:
+    distinct = list(dict.fromkeys(corpus))  # first occurrences, in corpus order
+    best = _best_of(parse_intent_fast, distinct, repeat)
+    unknown = sum(1 for m in distinct if parse_intent_fast(m)[0][0] == "unknown")
+    return {
+        "messages": len(distinct),
+        "us_per_msg": round(best / len(distinct) * 1e6, 3),
+        "msg_per_s": round(len(distinct) / best),
+        "unknown": unknown,
+    }
+
+
+def measure_normalize(repeat: int = 7, rounds: int = 200) -> dict:
+    replies = AI_REPLIES * rounds
+    best = _best_of(normalize_ai, replies, repeat)
+    return {
+        "replies": len(replies),
+        "us_per_reply": round(best / len(replies) * 1e6, 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--size", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=7)
+    args = ap.parse_args()
+
+    p = measure_parse(messages(args.size, args.seed), args.repeat)
+    print(
+        f"parse_intent_fast: {p['messages']} distinct messages, best of {args.repeat}: "
+        f"{p['us_per_msg']:.2f} us/msg, {p['msg_per_s']:,} msg/s "
+        f"({p['unknown']} fell through to unknown)"
+    )
+    n = measure_normalize(args.repeat)
+    print(f"normalize_ai: {n['replies']} replies, best of {args.repeat}: {n['us_per_reply']:.2f} us/reply")
+
+
+if __name__ == "__main__":
+    main()
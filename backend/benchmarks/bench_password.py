@@ -0,0 +1,93 @@
+"""
+Argon2 cost vs. login latency, through the same bounded pool the API uses.
+
+    cd backend && python -m benchmarks.bench_password [--target-ms 250] [--concurrency 1,4,16,64]
+
+Uses the ARGON2_* and PASSWORD_HASH_* settings (override them in the
+environment to try other values). Reports the cost of one verify, then
+fires bursts of concurrent verifies at the pool and shows p50/p95 latency,
+throughput and how many were turned away (the API answers those with 429).
+A cost is a good fit when p95 at your expected burst stays under the
+target.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import (  # noqa: E402
+    PasswordHashBusy,
+    PasswordHashPool,
+    hash_password,
+    verify_password,
+)
+
+from benchmarks.common import percentile  # noqa: E402
+
+
+async def burst(pool: PasswordHashPool, stored: str, concurrency: int) -> dict:
+    latencies = []
+    rejected = 0
+
+    async def one():
+        nonlocal rejected
+        start = time.perf_counter()
+        try:
+            await pool.run(verify_password, "correct horse", stored)
+        except PasswordHashBusy:
+            rejected += 1
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "p50_ms": percentile(latencies, 50) if latencies else None,
+        "p95_ms": percentile(latencies, 95) if latencies else None,
+        "per_s": len(latencies) / elapsed,
+        "rejected": rejected,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    print(
+        f"argon2 t={settings.argon2_time_cost} m={settings.argon2_memory_cost}KiB "
+        f"p={settings.argon2_parallelism}; pool: {settings.password_hash_workers} workers, "
+        f"queue {settings.password_hash_max_queue}"
+    )
+    stored = hash_password("correct horse")
+
+    single = []
+    for _ in range(args.samples):
+        start = time.perf_counter()
+        verify_password("correct horse", stored)
+        single.append((time.perf_counter() - start) * 1000)
+    print(f"one verify: median {statistics.median(single):.1f} ms (target {args.target_ms:g} ms)")
+
+    pool = PasswordHashPool(settings.password_hash_workers, settings.password_hash_max_queue)
+    print(f"\n{'burst':>6}{'p50 ms':>9}{'p95 ms':>9}{'verify/s':>10}{'429':>6}")
+    for concurrency in (int(c) for c in args.concurrency.split(",") if c.strip()):
+        r = await burst(pool, stored, concurrency)
+        p50 = "-" if r["p50_ms"] is None else f"{r['p50_ms']:.1f}"
+        p95 = "-" if r["p95_ms"] is None else f"{r['p95_ms']:.1f}"
+        flag = "  over target" if r["p95_ms"] and r["p95_ms"] > args.target_ms else ""
+        print(f"{concurrency:>6}{p50:>9}{p95:>9}{r['per_s']:>10.1f}{r['rejected']:>6}{flag}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--target-ms", type=float, default=250)
+    ap.add_argument("--samples", type=int, default=5)
+    ap.add_argument("--concurrency", default="1,4,16,64")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
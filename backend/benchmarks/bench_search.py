@@ -0,0 +1,76 @@
+"""
+Todo search latency by user size: the old ILIKE scan vs. app.services.search.
+
+    cd backend && python -m benchmarks.bench_search [--sizes 10,1000,50000] [--queries 200]
+
+Uses the same bench users and DATABASE_URL handling as bench_chat. On
+SQLite the search side is the in-process index (its one-off build is
+reported separately); on Postgres it is ILIKE over the pg_trgm indexes, so
+run `python -m app.cli migrate` against that database first.
+"""
+import argparse
+import time
+
+from benchmarks.bench_chat import SIZES, make_engine, seed_user  # sets DATABASE_URL
+
+from sqlmodel import Session, SQLModel, or_, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models import Todo  # noqa: E402
+from app.services.search import TodoSearch  # noqa: E402
+
+from benchmarks.common import percentile  # noqa: E402
+from benchmarks.corpus import TITLES  # noqa: E402
+
+QUERIES = ["milk", "groceries", "call", "report", "#12", "zzz-no-match", "e"]
+
+
+def ilike_scan(session: Session, user_id: int, q: str):
+    return session.exec(
+        select(Todo)
+        .where(Todo.user_id == user_id)
+        .where(or_(Todo.title.ilike(f"%{q}%"), Todo.description.ilike(f"%{q}%")))  # type: ignore
+        .order_by(Todo.id.asc())
+    ).all()
+
+
+def measure(fn, queries) -> dict:
+    runs = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        runs.append((time.perf_counter() - start) * 1000)
+    runs.sort()
+    return {"p50": percentile(runs, 50), "p95": percentile(runs, 95)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    engine = make_engine(settings.database_url)
+    SQLModel.metadata.create_all(engine)
+    words = QUERIES + [t.split()[0].lower() for t in TITLES]
+    queries = [words[i % len(words)] for i in range(args.queries)]
+
+    print(f"{engine.dialect.name}; {len(queries)} queries per size, limit 50 on the search side")
+    print(f"{'todos':>7}{'scan p50':>10}{'scan p95':>10}{'search p50':>12}{'search p95':>12}{'build ms':>10}")
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        user_id = seed_user(engine, size)
+        search = TodoSearch("auto", max_users=8, ttl_seconds=3600)
+        with Session(engine) as session:
+            start = time.perf_counter()
+            search.search(session, user_id, "warm-up")
+            build_ms = (time.perf_counter() - start) * 1000
+            scan = measure(lambda q: ilike_scan(session, user_id, q), queries)
+            found = measure(lambda q: search.search(session, user_id, q, limit=50), queries)
+        print(
+            f"{size:>7}{scan['p50']:>10.2f}{scan['p95']:>10.2f}"
+            f"{found['p50']:>12.2f}{found['p95']:>12.2f}{build_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Access-token encode/decode throughput per backend.
+
+    cd backend && python -m benchmarks.bench_tokens [--n 20000]
+
+Every backend decodes tokens from every other one, so switching
+JWT_BACKEND never invalidates live sessions; the run checks that too.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.tokens import BACKENDS, build_token_service  # noqa: E402
+
+
+def _rate(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--n", type=int, default=20000)
+    args = ap.parse_args()
+
+    services = {name: build_token_service(name) for name in BACKENDS}
+    issued = {name: svc.issue("bench@example.com", 60) for name, svc in services.items()}
+    for name, svc in services.items():
+        for other, token in issued.items():
+            assert svc.verify(token)["sub"] == "bench@example.com", (name, other)
+
+    print(f"{'backend':<8}{'encode us':>11}{'decode us':>11}")
+    for name, svc in services.items():
+        token = issued[name]
+        enc = _rate(lambda: svc.issue("bench@example.com", 60), args.n)
+        dec = _rate(lambda: svc.verify(token), args.n)
+        print(f"{name:<8}{enc:>11.2f}{dec:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare two bench_chat result files.
+
+    cd backend && python -m benchmarks.compare base.json new.json [--threshold 0.25]
+
+Flags a regression when an action issues more SQL statements than before
+(p50), or its p95 latency / the parse time grew by more than `threshold`
+(ignoring sub-millisecond noise). Exits 1 if anything regressed.
+"""
+import argparse
+import json
+import sys
+
+
+def _label(run: dict) -> str:
+    git = run.get("git") or {}
+    commit = (git.get("commit") or "unknown")[:10]
+    return commit + ("+dirty" if git.get("dirty") else "")
+
+
+def _parse_us(run: dict) -> float:
+    # files written while the parser kept a result memo also carry a cache-warm
+    # us_per_msg; only the uncached figure measures the parser itself
+    parse = run["parse"]
+    return parse.get("uncached_us_per_msg") or parse["us_per_msg"]
+
+
+def compare(base: dict, new: dict, threshold: float) -> list:
+    problems = []
+
+    b, n = _parse_us(base), _parse_us(new)
+    if n > b * (1 + threshold):
+        problems.append(f"parse_intent_fast: {b:.2f} -> {n:.2f} us/msg")
+
+    for size, rows in new["actions"].items():
+        old_rows = base["actions"].get(size, {})
+        for key, r in rows.items():
+            old = old_rows.get(key)
+            if old is None:
+                continue
+            if r["queries_p50"] > old["queries_p50"]:
+                problems.append(f"{size} todos, {key}: {old['queries_p50']} -> {r['queries_p50']} queries")
+            if r["ms_p95"] > old["ms_p95"] * (1 + threshold) and r["ms_p95"] - old["ms_p95"] >= 1:
+                problems.append(f"{size} todos, {key}: p95 {old['ms_p95']:.2f} -> {r['ms_p95']:.2f} ms")
+    return problems
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("base")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=0.25)
+    args = ap.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    if base.get("database") != new.get("database"):
+        print(f"warning: comparing {base.get('database')} against {new.get('database')}")
+    print(f"{_label(base)} -> {_label(new)}")
+
+    problems = compare(base, new, args.threshold)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    if not problems:
+        print("no regressions")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
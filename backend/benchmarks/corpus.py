@@ -0,0 +1,89 @@
+"""
+Deterministic corpus of chat messages for the benchmarks.
+
+Templates cover every phrasing family parse_intent_fast handles, plus
+messages it doesn't (those go to the LLM in production). `{n}`, `{m}` and
+`{title}` are filled from a seeded RNG, so a given (size, seed) always
+yields the same messages.
+"""
+import random
+from typing import List
+
+TITLES = [
+    "buy milk", "call mom", "pay rent", "gym", "finish the report", "walk the dog",
+    "book flights", "water plants", "email Sam", "renew passport", "fix the sink",
+]
+
+TEMPLATES = [
+    # status
+    "todo {n} is done", "task {n} is pending", "Todo {n} is completed", "todo {n} is not done",
+    "I've completed todo {n}", "i finished task {n}", "todo {n} is done and show my todos",
+    "mark todo {n} as completed", "mark todos {n} and {m} as done", "mark {n} to {m} as complete",
+    "reopen todo {n}", "uncomplete {n}", "incomplete todo {n}", "toggle {n}", "toggle todos {n} and {m}",
+    "mark all todos as completed", "mark all todos as pending", "mark the last one done", "toggle the 2nd todo",
+    # details
+    "show my latest todo", "what's my last todo", "show todo {n}", "show todo number {n}",
+    "show details of todo {n}", "details of the second todo", "what is todo {n}", "which todo is number {n}",
+    # list
+    "show my todos", "list completed todos", "show pending tasks", "what's on my list", "anything pending?",
+    "show first {n} todos", "list todos sorted by status desc", "show high priority todos", "my todo list",
+    "what do i have to do today", "anything left?",
+    # search
+    "which todo has {title}", "which task title is '{title}'", "find todos related to {title}",
+    "search tasks containing {title}", "do i have any todos for {title}?",
+    # add
+    "add a todo: {title}", "Add {title}", "add 3 todos: {title}, {title}, {title}", "create todo: {title}",
+    "remind me to {title}", "i need to {title}", "add title: {title} description: before noon",
+    "add {title} and show my list",
+    # delete
+    "delete todo {n}", "delete todos {n} to {m} and show remaining todos", "remove task {n}", "delete last",
+    "delete the {title} todo", "delete completed", "delete pending todos", "delete all todos", "clear my list",
+    # update
+    "update todo {n} title to {title}", "rename todo {n} to {title}", "edit todo {n} description to after lunch",
+    "change todo {n} title: {title} and description: soon", "update todo {n} status done",
+    "update todo {n} and add more details", "Add this description: urgent to todo {n}",
+    "update the second todo",
+    # count / summary / misc
+    "how many todos", "count pending todos", "total number of tasks done", "summary of my todos",
+    "group by status", "undo that",
+    # LLM fallback territory
+    "what should I focus on first?", "can you sort out my week", "I'm done with the dentist thing",
+    "hello there", "thanks!", "get rid of everything I finished", "push gym to tomorrow",
+]
+
+
+def messages(size: int = 5000, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    out: List[str] = []
+    while len(out) < size:
+        tpl = TEMPLATES[len(out) % len(TEMPLATES)] if len(out) < len(TEMPLATES) else rng.choice(TEMPLATES)
+        n = rng.randint(1, 40)
+        out.append(
+            tpl.replace("{n}", str(n))
+            .replace("{m}", str(n + rng.randint(1, 5)))
+            .replace("{title}", rng.choice(TITLES))
+        )
+    return out
+
+
+# Shapes the LLM returns (see SYSTEM_INSTRUCTIONS), one or more per action type
+AI_REPLIES = [
+    {"action": "add", "title": "buy milk", "description": "2 litres"},
+    {"action": "add_many", "items": [{"title": "gym"}, {"title": "pay rent"}, {"title": " "}]},
+    {"action": "add_many", "items": []},
+    {"action": "list", "filter": "pending", "priority": "high", "sort_by": "created_at", "sort_dir": "desc"},
+    {"action": "count", "filter": "completed"},
+    {"action": "summary"},
+    {"action": "details", "ids": [2, 5]},
+    {"action": "details", "ids": []},
+    {"action": "update", "ops": [{"id": 3, "title": "call mom", "completed": True}, {"id": 4, "description": "x"}]},
+    {"action": "update", "ops": ["bad", {"id": "7"}]},
+    {"action": "complete_all", "completed": False},
+    {"action": "delete", "ids": [1, 2, -3, "4"]},
+    {"action": "delete_all"},
+    {"action": "delete_filtered", "filter": "completed"},
+    {"action": "search", "query": "dentist"},
+    {"action": "clarify", "question": "Which one?"},
+    {"action": "dance"},
+    {},
+]
@@ -0,0 +1,293 @@
+"""
+Open-loop load test against a running API.
+
+    # stub Gemini, then start the API on a local Postgres
+    uvicorn app.services.fake_llm:app --port 8099
+    GEMINI_ENDPOINT=http://127.0.0.1:8099 DATABASE_URL=postgresql://localhost/todo_load \\
+        uvicorn main:app --port 8000 --workers 4
+
+    cd backend && python -m benchmarks.loadtest --rates 50,100,200,400 --duration 30 [--out run.json]
+
+Signs up `--users` synthetic users through /auth/signup, seeds each with a
+few todos, then fires requests at the given rate(s). Arrivals follow a Poisson
+process and don't wait for earlier responses. Latency is measured from a
+request's scheduled start, so a server falling behind shows up as latency
+instead of silently lowering the offered load. Each rate in `--rates` is a
+step; the step where achieved throughput stops tracking the offered rate (or
+p99 climbs) is the saturation point for that worker count.
+
+`--mix` sets the weight of each operation. Chat messages come from
+benchmarks.corpus; the ones the rule parser doesn't handle go to the LLM,
+i.e. to the fake server above. Needs httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+import json
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:  # not an app dependency
+    raise SystemExit("benchmarks.loadtest needs httpx: pip install httpx")
+
+from benchmarks.common import git_revision, percentile
+from benchmarks.corpus import TITLES, messages
+
+DEFAULT_MIX = "todos_list=30,todos_create=10,todos_patch=10,todos_delete=5,chat_message=30,chat_history=15"
+PASSWORD = "loadtest-password"
+
+
+class VirtualUser:
+    def __init__(self, email: str, token: str):
+        self.email = email
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.todo_ids: List[int] = []
+
+
+class Recorder:
+    """Per-route outcome samples for one rate step."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.client_errors: Dict[str, int] = defaultdict(int)
+        self.server_errors: Dict[str, int] = defaultdict(int)
+        self.failures: Dict[str, int] = defaultdict(int)  # timeouts, refused connections, ...
+        self.dropped = 0
+
+    def record(self, route: str, seconds: float, status: Optional[int]) -> None:
+        if status is None:
+            self.failures[route] += 1
+            return
+        self.latencies[route].append(seconds * 1000)
+        if status >= 500:
+            self.server_errors[route] += 1
+        elif status >= 400:
+            self.client_errors[route] += 1
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.failures)):
+            ms = sorted(self.latencies[route])
+            total = len(ms) + self.failures[route]
+            routes[route] = {
+                "requests": total,
+                "rps": round(total / elapsed, 1),
+                "p50_ms": round(percentile(ms, 50), 1) if ms else None,
+                "p95_ms": round(percentile(ms, 95), 1) if ms else None,
+                "p99_ms": round(percentile(ms, 99), 1) if ms else None,
+                "4xx": self.client_errors[route],
+                "5xx": self.server_errors[route],
+                "failed": self.failures[route],
+                "error_rate": round((self.server_errors[route] + self.failures[route]) / total, 4),
+            }
+        done = sum(r["requests"] for r in routes.values())
+        return {
+            "requests": done,
+            "achieved_rps": round(done / elapsed, 1),
+            "dropped": self.dropped,
+            "routes": routes,
+        }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation in --mix: {name!r} (have: {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ---------------------------------------------------------
+# Operations: each returns (route label, response status). Patch and
+# delete create a todo instead when the user has none left.
+# ---------------------------------------------------------
+async def todos_list(client: httpx.AsyncClient, user: VirtualUser, rng: random.Random):
+    r = await client.get("/todos", params={"limit": 50}, headers=user.headers)
+    return "GET /todos", r.status_code
+
+
+async def todos_create(client, user, rng):
+    r = await client.post("/todos", json={"title": rng.choice(TITLES)}, headers=user.headers)
+    if r.status_code == 201:
+        user.todo_ids.append(r.json()["id"])
+    return "POST /todos", r.status_code
+
+
+async def todos_patch(client, user, rng):
+    if not user.todo_ids:
+        return await todos_create(client, user, rng)
+    todo_id = rng.choice(user.todo_ids)
+    r = await client.patch(f"/todos/{todo_id}", json={"completed": rng.random() < 0.5}, headers=user.headers)
+    if r.status_code == 404:
+        user.todo_ids.remove(todo_id)  # deleted through chat meanwhile
+    return "PATCH /todos/{id}", r.status_code
+
+
+async def todos_delete(client, user, rng):
+    if not user.todo_ids:
+        return await todos_create(client, user, rng)
+    todo_id = user.todo_ids.pop(rng.randrange(len(user.todo_ids)))
+    r = await client.delete(f"/todos/{todo_id}", headers=user.headers)
+    return "DELETE /todos/{id}", r.status_code
+
+
+async def chat_message(client, user, rng):
+    r = await client.post("/chat/message", json={"message": rng.choice(CHAT_MESSAGES)}, headers=user.headers)
+    return "POST /chat/message", r.status_code
+
+
+async def chat_history(client, user, rng):
+    r = await client.get("/chat/history", headers=user.headers)
+    return "GET /chat/history", r.status_code
+
+
+# name -> (route label, operation); the label is used when no response came back
+OPERATIONS = {
+    "todos_list": ("GET /todos", todos_list),
+    "todos_create": ("POST /todos", todos_create),
+    "todos_patch": ("PATCH /todos/{id}", todos_patch),
+    "todos_delete": ("DELETE /todos/{id}", todos_delete),
+    "chat_message": ("POST /chat/message", chat_message),
+    "chat_history": ("GET /chat/history", chat_history),
+}
+CHAT_MESSAGES = messages(2000, seed=11)
+
+
+# ---------------------------------------------------------
+# Setup and driver
+# ---------------------------------------------------------
+async def sign_up(client: httpx.AsyncClient, count: int, seed_todos: int, concurrency: int) -> List[VirtualUser]:
+    run = uuid.uuid4().hex[:8]
+    gate = asyncio.Semaphore(concurrency)  # signup hashes a password; don't storm it
+
+    async def one(i: int) -> VirtualUser:
+        email = f"load-{run}-{i}@example.com"
+        async with gate:
+            r = await client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+            r.raise_for_status()
+            user = VirtualUser(email, r.json()["access_token"])
+            if seed_todos:
+                ops = [{"op": "create", "title": TITLES[j % len(TITLES)]} for j in range(seed_todos)]
+                r = await client.post("/todos/batch", json={"ops": ops}, headers=user.headers)
+                r.raise_for_status()
+                user.todo_ids = [res["id"] for res in r.json()["results"] if res["status"] == 201]
+        return user
+
+    return await asyncio.gather(*(one(i) for i in range(count)))
+
+
+async def run_step(
+    client: httpx.AsyncClient,
+    users: List[VirtualUser],
+    mix: Dict[str, float],
+    rate: float,
+    duration: float,
+    max_in_flight: int,
+    rng: random.Random,
+) -> dict:
+    recorder = Recorder()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    tasks = set()
+
+    async def fire(scheduled: float, name: str, user: VirtualUser) -> None:
+        route, op = OPERATIONS[name]
+        try:
+            route, status = await op(client, user, rng)
+        except httpx.HTTPError:
+            status = None
+        recorder.record(route, time.perf_counter() - scheduled, status)
+
+    start = time.perf_counter()
+    next_at = start
+    while next_at - start < duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            recorder.dropped += 1  # the client itself is saturated
+        else:
+            name = rng.choices(names, weights)[0]
+            task = asyncio.create_task(fire(next_at, name, rng.choice(users)))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_at += rng.expovariate(rate)
+
+    if tasks:
+        await asyncio.wait(tasks)
+    return recorder.report(time.perf_counter() - start)
+
+
+def print_step(rate: float, result: dict) -> None:
+    print(
+        f"\noffered {rate:g} rps -> achieved {result['achieved_rps']} rps "
+        f"({result['requests']} requests, {result['dropped']} dropped)"
+    )
+    print(f"  {'route':<22}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'4xx':>6}{'5xx':>6}{'fail':>6}")
+    for route, r in result["routes"].items():
+        def ms(v):
+            return "-" if v is None else f"{v:.1f}"
+
+        print(
+            f"  {route:<22}{r['rps']:>8}{ms(r['p50_ms']):>9}{ms(r['p95_ms']):>9}{ms(r['p99_ms']):>9}"
+            f"{r['4xx']:>6}{r['5xx']:>6}{r['failed']:>6}"
+        )
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        users = await sign_up(client, args.users, args.seed_todos, args.signup_concurrency)
+        print(f"signed up {len(users)} users in {time.perf_counter() - started:.1f}s")
+
+        steps = []
+        for rate in (float(r) for r in args.rates.split(",") if r.strip()):
+            result = await run_step(client, users, mix, rate, args.duration, args.max_in_flight, rng)
+            print_step(rate, result)
+            steps.append({"offered_rps": rate, **result})
+
+    return {
+        "git": git_revision(),
+        "base_url": args.base_url,
+        "users": args.users,
+        "duration": args.duration,
+        "mix": mix,
+        "steps": steps,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--seed-todos", type=int, default=20, help="todos created per user before the run")
+    ap.add_argument("--rates", default="50", help="offered requests/s; comma-separated for a sweep")
+    ap.add_argument("--duration", type=float, default=30, help="seconds per rate step")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight,...")
+    ap.add_argument("--max-in-flight", type=int, default=1000)
+    ap.add_argument("--signup-concurrency", type=int, default=8)
+    ap.add_argument("--timeout", type=float, default=30)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", help="write the JSON results here")
+    args = ap.parse_args()
+
+    result = asyncio.run(main_async(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
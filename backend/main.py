@@ -1,7 +1,12 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.config import settings
 from app.core.database import init_db
+from app.core.instrumentation import InstrumentationMiddleware
+from app.core.revocation import revocations, revocation_maintenance
 from app.api import api_router
 
 app = FastAPI(title="Todo App (FastAPI + Neon + JWT + Gemini)")
@@ -16,11 +21,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "Content-Disposition"],
+)
+
+# Outermost, so its total covers everything below it
+app.add_middleware(
+    InstrumentationMiddleware,
+    server_timing=settings.server_timing,
+    log_requests=settings.request_log,
+    slow_ms=settings.slow_request_ms,
 )
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     init_db()
+    revocations.refresh()
+    app.state.revocation_job = asyncio.create_task(revocation_maintenance())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.revocation_job.cancel()
 
 @app.get("/")
 def health():
@@ -0,0 +1,43 @@
+"""
+LLM fallback of POST /chat/message when the LLM isn't configured.
+
+    cd backend && python -m unittest discover tests
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+# a throwaway SQLite file (an in-memory database isn't shared across threads)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='todo-tests-')}/test.db")
+
+from fastapi import HTTPException  # noqa: E402
+
+from app.api.routes.chat import send_message  # noqa: E402
+from app.models import User  # noqa: E402
+from app.schemas.chat import ChatIn  # noqa: E402
+from app.services.llm import llm  # noqa: E402
+
+
+class LLMNotConfiguredTest(unittest.TestCase):
+    def setUp(self):
+        # no fake server (GEMINI_ENDPOINT) and no API key
+        saved = (llm.endpoint, llm.api_key, llm._configured)
+        self.addCleanup(self._restore, saved)
+        llm.endpoint, llm.api_key, llm._configured = "", "", False
+
+    @staticmethod
+    def _restore(saved):
+        llm.endpoint, llm.api_key, llm._configured = saved
+
+    def test_unparsed_message_is_a_server_error(self):
+        user = User(id=1, email="llm-test@example.invalid", password_hash="!")
+        with self.assertRaises(HTTPException) as ctx:
+            # the rules don't parse this, so it needs the LLM; it fails before touching the session
+            asyncio.run(send_message(ChatIn(message="hello there"), user=user, session=None))
+        self.assertEqual(ctx.exception.status_code, 500)
+        self.assertIn("API key", ctx.exception.detail)
+
+
+if __name__ == "__main__":
+    unittest.main()
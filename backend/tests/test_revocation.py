@@ -0,0 +1,73 @@
+"""
+Logouts handled by another worker (only the revokedtoken row is shared).
+
+    cd backend && python -m unittest discover tests
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+
+# a throwaway SQLite file (an in-memory database isn't shared across threads)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='todo-tests-')}/test.db")
+
+from fastapi import HTTPException  # noqa: E402
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+from app.api.deps import get_current_user  # noqa: E402
+from app.api.routes.auth import _revoke  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import engine, init_db  # noqa: E402
+from app.core.revocation import revocations  # noqa: E402
+from app.core.security import create_access_token, decode_token  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+class SecondWorkerLogoutTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+        with Session(engine) as session:
+            if not session.exec(select(User).where(User.email == "revoke-test@example.invalid")).first():
+                session.add(User(email="revoke-test@example.invalid", password_hash="!"))
+                session.commit()
+
+    def setUp(self):
+        self.token = create_access_token("revoke-test@example.invalid", 5)
+        self.jti = decode_token(self.token)["jti"]
+        revocations.refresh()  # this worker's set is loaded and in sync
+
+    def authenticate(self) -> User:
+        creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=self.token)
+        with Session(engine) as session:
+            return asyncio.run(get_current_user(creds=creds, session=session))
+
+    def logout_on_other_worker(self) -> None:
+        # what /auth/logout does there: the row is written, this worker's set is untouched
+        with Session(engine) as session:
+            _revoke(session, self.jti)
+
+    def assertRevoked(self):
+        with self.assertRaises(HTTPException) as ctx:
+            self.authenticate()
+        self.assertEqual(ctx.exception.status_code, 401)
+
+    def test_rejected_after_next_sync(self):
+        self.assertEqual(self.authenticate().email, "revoke-test@example.invalid")
+        self.logout_on_other_worker()
+        revocations.refresh()  # the periodic job, at most REVOCATION_SYNC_SECONDS later
+        self.assertRevoked()
+
+    def test_rejected_at_once_without_sync(self):
+        saved = settings.revocation_sync_seconds
+        self.addCleanup(setattr, settings, "revocation_sync_seconds", saved)
+        settings.revocation_sync_seconds = 0
+
+        self.assertEqual(self.authenticate().email, "revoke-test@example.invalid")
+        self.logout_on_other_worker()
+        self.assertRevoked()  # no sync in between: the table is asked
+
+
+if __name__ == "__main__":
+    unittest.main()
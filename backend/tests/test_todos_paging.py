@@ -0,0 +1,58 @@
+"""
+GET /todos pages by default; following the cursor walks the whole list.
+
+    cd backend && python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+# a throwaway SQLite file (an in-memory database isn't shared across threads)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='todo-tests-')}/test.db")
+
+from sqlalchemy import insert  # noqa: E402
+from sqlmodel import Session, delete, select  # noqa: E402
+
+from app.api.routes.todos import DEFAULT_PAGE_SIZE, _list_todos  # noqa: E402
+from app.core.database import engine, init_db  # noqa: E402
+from app.models import Todo, User  # noqa: E402
+
+TODOS = DEFAULT_PAGE_SIZE * 2 + 7
+
+
+class ListTodosPagingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        init_db()
+        with Session(engine) as session:
+            user = session.exec(select(User).where(User.email == "paging-test@example.invalid")).first()
+            if user is None:
+                user = User(email="paging-test@example.invalid", password_hash="!")
+                session.add(user)
+                session.commit()
+                session.refresh(user)
+            cls.user_id = user.id
+            session.exec(delete(Todo).where(Todo.user_id == cls.user_id))
+            session.execute(insert(Todo), [{"user_id": cls.user_id, "title": f"todo {i}"} for i in range(TODOS)])
+            session.commit()
+
+    def test_without_limit_one_page_comes_back(self):
+        with Session(engine) as session:
+            items, next_cursor = _list_todos(session, self.user_id)
+        self.assertEqual(len(items), DEFAULT_PAGE_SIZE)
+        self.assertEqual(next_cursor, items[-1].id)
+
+    def test_following_the_cursor_returns_every_todo_once(self):
+        seen, cursor = [], None
+        with Session(engine) as session:
+            while True:
+                items, cursor = _list_todos(session, self.user_id, cursor=cursor)
+                seen.extend(t.id for t in items)
+                if cursor is None:
+                    break
+        self.assertEqual(len(seen), TODOS)
+        self.assertEqual(seen, sorted(set(seen), reverse=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,24 +1,66 @@
 "use client";
 
-import { useEffect, useState } from "react";
-import { api } from "@/lib/api";
+import { useEffect, useRef, useState } from "react";
+import { api, apiPage } from "@/lib/api";
 import { useRouter } from "next/navigation";
 
-type Msg = { id: number; role: string; content: string };
+// local: shown optimistically, not confirmed by the server yet
+type Msg = { id: number; role: string; content: string; local?: boolean };
+
+const PAGE_SIZE = 50;
 
 export default function ChatPage() {
   const [history, setHistory] = useState<Msg[]>([]);
   const [message, setMessage] = useState("");
   const [err, setErr] = useState<string | null>(null);
   const [isTyping, setIsTyping] = useState(false);
+  // before_id for the page of older messages (null: nothing older)
+  const [olderCursor, setOlderCursor] = useState<number | null>(null);
+  // newest message id the server has confirmed
+  const lastId = useRef(0);
 
   const router = useRouter();
 
   async function load() {
     setErr(null);
     try {
-      const data = await api("/chat/history");
+      const { data, nextCursor } = await apiPage(`/chat/history?limit=${PAGE_SIZE}`);
       setHistory(data);
+      setOlderCursor(nextCursor);
+      lastId.current = data.length ? data[data.length - 1].id : 0;
+    } catch (e: any) {
+      setErr(e.message ?? "Failed to load chat history");
+    }
+  }
+
+  async function loadOlder() {
+    if (olderCursor === null) return;
+    setErr(null);
+    try {
+      const { data, nextCursor } = await apiPage(
+        `/chat/history?limit=${PAGE_SIZE}&before_id=${olderCursor}`
+      );
+      setHistory((h) => [...data, ...h]);
+      setOlderCursor(nextCursor);
+    } catch (e: any) {
+      setErr(e.message ?? "Failed to load chat history");
+    }
+  }
+
+  // Fetch only what the server stored after lastId, replacing optimistic messages
+  async function syncNew() {
+    try {
+      const fresh: Msg[] = [];
+      let since: number | null = lastId.current;
+      while (since !== null) {
+        const { data, nextCursor } = await apiPage(
+          `/chat/history?limit=${PAGE_SIZE}&since_id=${since}`
+        );
+        fresh.push(...data);
+        since = nextCursor;
+      }
+      if (fresh.length) lastId.current = fresh[fresh.length - 1].id;
+      setHistory((h) => [...h.filter((m) => !m.local), ...fresh]);
     } catch (e: any) {
       setErr(e.message ?? "Failed to load chat history");
     }
@@ -33,6 +75,7 @@ export default function ChatPage() {
     try {
       await api("/chat/clear", { method: "DELETE" });
       setHistory([]);
+      setOlderCursor(null);
     } catch (e: any) {
       setErr(e.message ?? "Failed to clear chat history");
     }
@@ -44,7 +87,7 @@ export default function ChatPage() {
 
     setErr(null);
 
-    const localUser: Msg = { id: Date.now(), role: "user", content: trimmed };
+    const localUser: Msg = { id: Date.now(), role: "user", content: trimmed, local: true };
     setHistory((h) => [...h, localUser]);
     setMessage("");
 
@@ -61,14 +104,14 @@ export default function ChatPage() {
 
       setHistory((h) => [
         ...h,
-        { id: Date.now() + 1, role: "assistant", content: data.message },
+        { id: Date.now() + 1, role: "assistant", content: data.message, local: true },
       ]);
     } catch (e: any) {
       setIsTyping(false);
       setErr(e.message ?? "Failed to send message");
 
-      // IMPORTANT: if backend saved reply but fetch failed, reload history
-      load();
+      // IMPORTANT: if backend saved reply but fetch failed, pick up what it stored
+      syncNew();
     }
   }
 
@@ -103,6 +146,15 @@ export default function ChatPage() {
 
         {/* Chat */}
         <div className="flex-1 overflow-y-auto p-3 sm:p-4 space-y-3">
+          {olderCursor !== null && (
+            <button
+              onClick={loadOlder}
+              className="block mx-auto text-xs px-3 py-1 rounded-md bg-gray-100 hover:bg-gray-200 text-gray-600"
+            >
+              Load earlier messages
+            </button>
+          )}
+
           {history.map((m) => (
             <div
               key={m.id}
@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useMemo, useRef, useState } from "react";
-import { api } from "@/lib/api";
+import { api, apiPage } from "@/lib/api";
 import { clearToken } from "@/lib/auth";
 import { useRouter } from "next/navigation";
 
@@ -12,6 +12,11 @@ type Todo = {
   completed: boolean;
 };
 
+// TodoBatchIn.ops max_length on the backend
+const BATCH_MAX_OPS = 1000;
+// MAX_PAGE_SIZE for GET /todos on the backend
+const PAGE_SIZE = 500;
+
 export default function DashboardPage() {
   const router = useRouter();
 
@@ -44,13 +49,22 @@ export default function DashboardPage() {
     setErr(null);
     try {
       setLoading(true);
-      const data = await api("/todos");
+      // GET /todos returns one page at a time; follow X-Next-Cursor to the end
+      const data: Todo[] = [];
+      let cursor: number | null = null;
+      do {
+        const page: { data: Todo[]; nextCursor: number | null } = await apiPage(
+          `/todos?limit=${PAGE_SIZE}` + (cursor !== null ? `&cursor=${cursor}` : "")
+        );
+        data.push(...page.data);
+        cursor = page.nextCursor;
+      } while (cursor !== null);
       setTodos(data);
 
       // remove selections that no longer exist
       setSelectedIds((prev) => {
         const next = new Set<number>();
-        const ids = new Set<number>(data.map((t: Todo) => t.id));
+        const ids = new Set<number>(data.map((t) => t.id));
         for (const id of prev) {
           if (ids.has(id)) next.add(id);
         }
@@ -165,6 +179,18 @@ export default function DashboardPage() {
     }
   }
 
+  /* ---------------- BATCH DELETE (one request, one commit per chunk) ---------------- */
+  async function deleteMany(ids: number[]) {
+    // POST /todos/batch takes at most BATCH_MAX_OPS ops
+    for (let i = 0; i < ids.length; i += BATCH_MAX_OPS) {
+      const chunk = ids.slice(i, i + BATCH_MAX_OPS);
+      await api("/todos/batch", {
+        method: "POST",
+        body: JSON.stringify({ ops: chunk.map((id) => ({ op: "delete", id })) }),
+      });
+    }
+  }
+
   /* ---------------- DELETE SELECTED ---------------- */
   async function deleteSelected() {
     if (selectedIds.size === 0) return;
@@ -177,7 +203,7 @@ export default function DashboardPage() {
       setLoading(true);
 
       const ids = Array.from(selectedIds);
-      await Promise.all(ids.map((id) => api(`/todos/${id}`, { method: "DELETE" })));
+      await deleteMany(ids);
 
       setSelectedIds(new Set());
       await loadTodos();
@@ -200,7 +226,7 @@ export default function DashboardPage() {
       setLoading(true);
 
       const ids = todos.map((t) => t.id);
-      await Promise.all(ids.map((id) => api(`/todos/${id}`, { method: "DELETE" })));
+      await deleteMany(ids);
 
       setSelectedIds(new Set());
       await loadTodos();
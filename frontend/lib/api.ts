@@ -2,7 +2,7 @@ import { getToken } from "./auth";
 
 const BASE = process.env.NEXT_PUBLIC_API_BASE!;
 
-export async function api(path: string, options: RequestInit = {}) {
+async function request(path: string, options: RequestInit = {}) {
   const token = getToken();
 
   const headers: Record<string, string> = {
@@ -23,6 +23,18 @@ export async function api(path: string, options: RequestInit = {}) {
     throw new Error(msg);
   }
 
+  return res;
+}
+
+export async function api(path: string, options: RequestInit = {}) {
+  const res = await request(path, options);
   if (res.status === 204) return null;
   return res.json();
+}
+
+// For keyset-paged endpoints: the cursor for the next call comes back in X-Next-Cursor
+export async function apiPage(path: string, options: RequestInit = {}) {
+  const res = await request(path, options);
+  const cursor = res.headers.get("X-Next-Cursor");
+  return { data: await res.json(), nextCursor: cursor ? Number(cursor) : null };
 }
\ No newline at end of file